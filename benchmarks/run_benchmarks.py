@@ -0,0 +1,149 @@
+"""
+Benchmarks for the images package on synthetic scenes.
+
+Usage
+-----
+python benchmarks/run_benchmarks.py --sizes 256 1K 4K --output results.json
+python benchmarks/run_benchmarks.py --save-baseline baseline.json
+python benchmarks/run_benchmarks.py --baseline baseline.json --tolerance 0.2
+
+When a baseline is given, cases whose median time is more than tolerance
+slower than the baseline are listed and the script exits with status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'images'))
+
+from images import *  # noqa: E402
+from images.morphological import dilate, opening  # noqa: E402
+import scenes  # noqa: E402
+
+
+def make_cases(size):
+    """
+    Builds the benchmark cases for one image size.
+
+    Returns
+    -------
+    cases: dict mapping case names to functions taking no arguments
+    """
+    gray, discs = scenes.circles(size)
+    lattice = scenes.hex_lattice(size)
+    noisy = scenes.noise(size)
+    bgr = scenes.colour_blobs(size)
+    binary = threshold(gray)
+    contours = find_contours(binary)
+    radius = 20
+    return {
+        'smoothing.gaussian_blur': lambda: gaussian_blur(noisy, (5, 5)),
+        'smoothing.median_blur': lambda: median_blur(noisy, 5),
+        'thresholding.threshold_otsu': lambda: threshold(gray),
+        'thresholding.adaptive_threshold':
+            lambda: adaptive_threshold(noisy, 51, 0),
+        'thresholding.distance_transform':
+            lambda: distance_transform(binary),
+        'morphological.dilate': lambda: dilate(binary, (5, 5)),
+        'morphological.opening': lambda: opening(binary, (5, 5)),
+        'contours.find_contours': lambda: find_contours(binary),
+        'contours.sort_contours': lambda: sort_contours(contours),
+        'contours.contour_features': lambda: contour_features(contours),
+        'feature_detection.find_connected_components':
+            lambda: find_connected_components(binary),
+        'feature_detection.find_circles':
+            lambda: find_circles(lattice, 18, 200, 10, 7, 11),
+        'draw.draw_circles':
+            lambda: draw_circles(gray_to_bgr(gray), discs),
+        'draw.draw_contours':
+            lambda: draw_contours(gray_to_bgr(gray), contours),
+        'geometric.resize': lambda: resize(bgr, 25),
+        'geometric.rotate': lambda: rotate(bgr, 30),
+        'colors.bgr_to_gray': lambda: bgr_to_gray(bgr),
+        'colors.bgr_to_lab': lambda: bgr_to_lab(bgr),
+    }
+
+
+def time_case(func, repeat):
+    """Returns the median and minimum of repeat timed calls after a warm up"""
+    func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)), float(np.min(times))
+
+
+def run(sizes, repeat, match=None):
+    results = {}
+    for size_name in sizes:
+        size = scenes.SIZES[size_name]
+        for case, func in make_cases(size).items():
+            if match and match not in case:
+                continue
+            median, best = time_case(func, repeat)
+            key = '{}[{}]'.format(case, size_name)
+            results[key] = {'median': median, 'min': best}
+            print('{:<55} {:>10.3f} ms'.format(key, median * 1e3))
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Returns a list of (case, baseline, current) for slower cases"""
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        old = baseline[key]['median']
+        if result['median'] > old * (1 + tolerance):
+            regressions.append((key, old, result['median']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', nargs='+', default=['256', '1K', '4K'],
+                        choices=list(scenes.SIZES))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--match', help='only run cases containing this')
+    parser.add_argument('--output', help='write results to this json file')
+    parser.add_argument('--baseline', help='compare with this json file')
+    parser.add_argument('--save-baseline', help='write results as baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed fractional slowdown, default 0.2')
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.repeat, args.match)
+    report = {'machine': platform.platform(),
+              'python': platform.python_version(),
+              'opencv': cv2.__version__,
+              'numpy': np.__version__,
+              'results': results}
+    for filename in (args.output, args.save_baseline):
+        if filename:
+            with open(filename, 'w') as f:
+                json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        for key, old, new in regressions:
+            print('REGRESSION {}: {:.3f} ms -> {:.3f} ms'.format(
+                key, old * 1e3, new * 1e3))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Synthetic test images for the benchmarks.
+
+Every scene is generated from a seed so runs on different machines time
+the same pixels.
+"""
+import cv2
+import numpy as np
+
+SIZES = {
+    '256': (256, 256),
+    '512': (512, 512),
+    '1K': (1024, 1024),
+    '2K': (2048, 2048),
+    '4K': (3840, 2160),
+    '8K': (7680, 4320),
+}
+
+
+def circles(size, radius=20, fill=0.3, seed=0):
+    """
+    Grayscale image of bright discs on a dark background.
+
+    Returns
+    -------
+    im: uint8 image of shape (height, width)
+
+    discs: array of (x, y, r) for every disc drawn
+    """
+    width, height = size
+    rng = np.random.default_rng(seed)
+    n = int(fill * width * height / (np.pi * radius ** 2))
+    x = rng.uniform(radius, width - radius, n)
+    y = rng.uniform(radius, height - radius, n)
+    r = rng.uniform(0.7 * radius, radius, n)
+    discs = np.stack((x, y, r), axis=1)
+    im = np.full((height, width), 30, np.uint8)
+    for cx, cy, cr in discs:
+        cv2.circle(im, (int(cx), int(cy)), int(cr), 220, -1)
+    return im, discs
+
+
+def hex_lattice(size, spacing=24, radius=9):
+    """Grayscale image of discs on a hexagonal lattice"""
+    width, height = size
+    im = np.full((height, width), 20, np.uint8)
+    row_height = spacing * np.sqrt(3) / 2
+    for row in range(int(height / row_height) + 1):
+        offset = spacing / 2 if row % 2 else 0
+        cy = int(row * row_height)
+        for cx in np.arange(offset, width, spacing):
+            cv2.circle(im, (int(cx), cy), radius, 200, -1)
+    return im
+
+
+def noise(size, seed=0):
+    """Uniform grayscale noise"""
+    width, height = size
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, (height, width), dtype=np.uint8)
+
+
+def colour_blobs(size, n=None, seed=0):
+    """BGR image of smooth coloured blobs on a grey background"""
+    width, height = size
+    rng = np.random.default_rng(seed)
+    n = n or max(width * height // 20000, 4)
+    im = np.full((height, width, 3), 128, np.uint8)
+    for _ in range(n):
+        centre = (int(rng.uniform(0, width)), int(rng.uniform(0, height)))
+        axes = (int(rng.uniform(10, 60)), int(rng.uniform(10, 60)))
+        colour = tuple(int(c) for c in rng.integers(0, 256, 3))
+        cv2.ellipse(im, centre, axes, float(rng.uniform(0, 180)), 0, 360,
+                    colour, -1)
+    return cv2.GaussianBlur(im, (7, 7), 0)
@@ -1,10 +1,44 @@
+import importlib
+
 from images.basics import *
 from images.colors import *
 from images.cropping import *
 from images.thresholding import *
 from images.draw import *
 from images.geometric import *
-from images.gui_base import *
 from images.feature_detection import *
 from images.smoothing import *
 from images.contours import *
+from images.stack import *
+from images.video import *
+from images.temporal import *
+from images.probe import *
+from images.pipeline import *
+from images.parallel import *
+from images.profiling import *
+from images.tiling import *
+from images.background import *
+from images.tracking import *
+from images.histograms import *
+from images.colour_classifier import *
+
+# The guis need tkinter and PIL so they are only imported when first used
+_lazy = {
+    'ParamGui': 'images.gui_base',
+    'ThresholdGui': 'images.gui',
+    'CircleGui': 'images.gui',
+    'AdaptiveThresholdGui': 'images.gui',
+    'Inrange3GUI': 'images.gui',
+    'InrangeGui': 'images.gui',
+    'CannyGui': 'images.gui',
+    'ContoursGui': 'images.gui',
+}
+
+
+def __getattr__(name):
+    if name in _lazy:
+        value = getattr(importlib.import_module(_lazy[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(
+        'module {!r} has no attribute {!r}'.format(__name__, name))
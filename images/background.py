@@ -0,0 +1,158 @@
+import cv2
+import numpy as np
+
+from images import thresholding
+from images.temporal import RunningMean, RunningMedian
+
+__all__ = [
+    'BackgroundModel'
+]
+
+
+class _WindowMedian:
+    """Approximate per pixel median of the last window frames"""
+
+    def __init__(self, window, bins, value_range):
+        self.window = window
+        self.histogram = RunningMedian(bins, value_range)
+        self.frames = None
+        self.count = 0
+
+    def update(self, frame):
+        if self.frames is None:
+            self.frames = np.empty((self.window,) + frame.shape, frame.dtype)
+        # The oldest frame is kept so it can be taken out of the histogram
+        slot = self.count % self.window
+        old = self.frames[slot] if self.count >= self.window else None
+        self.histogram.slide(frame, old)
+        self.frames[slot] = frame
+        self.count += 1
+
+    @property
+    def median(self):
+        return self.histogram.median
+
+
+class BackgroundModel:
+    """
+    Background estimate of a video updated one frame at a time.
+
+    Parameters
+    ----------
+    mode: how the background is estimated
+        'mean': average of every frame so far
+        'exponential': running average where older frames decay by alpha
+            per frame, follows slow changes in lighting
+        'median': approximate median of the last window frames, ignores
+            objects that pass through
+
+    alpha: weight of the newest frame in 'exponential' mode
+
+    window: number of frames kept in 'median' mode
+
+    bins, value_range: per pixel histogram used in 'median' mode, see
+        RunningMedian. The median is within one bin width of the exact
+        value and the histogram uses 4 * bins bytes per pixel.
+
+    Notes
+    -----
+    Updates cost O(H x W) in every mode. The 'median' mode keeps the last
+    window frames so the oldest can be taken out of its histogram.
+
+    Examples
+    --------
+    model = BackgroundModel('exponential', alpha=0.02)
+    for frame in read_imgs('frames/*.png', flag=0):
+        mask = model.apply(frame, value=30)
+        labels, stats, centroids = find_connected_components(mask)
+    """
+
+    def __init__(self, mode='exponential', alpha=0.05, window=25, bins=16,
+                 value_range=(0, 256)):
+        if mode not in ('mean', 'exponential', 'median'):
+            raise ValueError(
+                "mode must be 'mean', 'exponential' or 'median'")
+        self.mode = mode
+        self.alpha = alpha
+        self.window = window
+        self.count = 0
+        self.dtype = None
+        self._mean = RunningMean()
+        self._average = None
+        self._median = _WindowMedian(window, bins, value_range)
+
+    def update(self, frame):
+        """Adds a frame to the background estimate"""
+        if self.count == 0:
+            self.dtype = frame.dtype
+        if self.mode == 'mean':
+            self._mean.update(frame)
+        elif self.mode == 'exponential':
+            if self._average is None:
+                self._average = frame.astype(np.float32)
+            else:
+                cv2.accumulateWeighted(frame, self._average, self.alpha)
+        else:
+            self._median.update(frame)
+        self.count += 1
+        return self
+
+    @property
+    def background(self):
+        """Current background as an image of the same type as the frames"""
+        if self.count == 0:
+            raise ValueError('No frames have been added to the model')
+        if self.mode == 'mean':
+            background = self._mean.mean
+        elif self.mode == 'exponential':
+            background = self._average
+        else:
+            background = self._median.median
+        if np.issubdtype(self.dtype, np.integer):
+            background = np.rint(background)
+        return background.astype(self.dtype)
+
+    def difference(self, frame):
+        """
+        Absolute difference between a frame and the background.
+
+        Colour frames are reduced to the largest difference over the
+        channels so the result is always single channel.
+        """
+        diff = cv2.absdiff(frame, self.background)
+        if diff.ndim == 3:
+            diff = np.max(diff, axis=2)
+        return diff
+
+    def foreground(self, frame, value=25, out=None):
+        """
+        Foreground mask of a frame.
+
+        Parameters
+        ----------
+        frame: image of the same shape and type as the modelled frames
+
+        value: pixels that differ from the background by more than value
+            are foreground
+
+        out: optional preallocated output passed to threshold
+
+        Returns
+        -------
+        mask: single channel image
+            255 for foreground and 0 for background, ready for
+            find_connected_components or find_contours
+        """
+        diff = self.difference(frame)
+        if diff.dtype != np.uint8:
+            diff = np.minimum(diff, 255).astype(np.uint8)
+        return thresholding.threshold(diff, value, out=out)
+
+    def apply(self, frame, value=25, out=None):
+        """Returns the foreground mask of frame and then adds it to the model"""
+        if self.count == 0:
+            self.update(frame)
+            return self.foreground(frame, value, out)
+        mask = self.foreground(frame, value, out)
+        self.update(frame)
+        return mask
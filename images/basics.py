@@ -1,16 +1,27 @@
+import glob
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
-import matplotlib.pyplot as plt
 import numpy as np
 
+from images.temporal import RunningMean
+
 __all__ = [
     'display',
     'plot',
     'read_img',
     'load',
     'read',
+    'read_imgs',
+    'load_imgs',
     'write_img',
     'save',
     'write',
+    'ImageWriter',
     'width_and_height',
     'dimensions',
     'height',
@@ -23,22 +34,134 @@ __all__ = [
 
 
 class Displayer:
-    def __init__(self, window_name, resolution=(1280, 720)):
+    """
+    Displays a stream of images in a window.
+
+    Parameters
+    ----------
+    window_name: title of the window
+
+    resolution: (width, height) of the window
+
+    threaded: show images from a background thread
+        update_im returns immediately and the window always shows the
+        latest image. Images arriving faster than they can be shown are
+        dropped rather than slowing down the caller.
+
+    delay: time in ms to wait after showing each image when not threaded
+
+    show_fps: add the measured frame rates to the window title
+
+    Attributes
+    ----------
+    processing_fps: rate at which update_im is being called
+
+    display_fps: rate at which images are being shown
+
+    dropped: number of images replaced before they were shown
+
+    Notes
+    -----
+    In threaded mode images are not copied so the window may show a
+    partially updated image if the caller writes into the same array.
+    """
+
+    def __init__(self, window_name, resolution=(1280, 720), threaded=False,
+                 delay=100, show_fps=False):
         self.window_name = window_name
+        self.resolution = resolution
+        self.threaded = threaded
+        self.delay = delay
+        self.show_fps = show_fps
+        self.processing_fps = 0.0
+        self.display_fps = 0.0
+        self.dropped = 0
+        self._last_update = None
+        self._last_display = None
+        if threaded:
+            self._frame = None
+            self._running = True
+            self._condition = threading.Condition()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        else:
+            self._create_window()
+
+    def _create_window(self):
         cv2.namedWindow(self.window_name, cv2.WINDOW_KEEPRATIO)
-        cv2.resizeWindow(self.window_name, *resolution)
+        cv2.resizeWindow(self.window_name, *self.resolution)
 
     def update_im(self, im):
+        self.processing_fps, self._last_update = _update_rate(
+            self.processing_fps, self._last_update)
+        if not self.threaded:
+            self._show(im)
+            if cv2.waitKey(self.delay) & 0xFF == ord('q'):
+                pass
+            return
+        with self._condition:
+            if not self._running:
+                raise RuntimeError('Displayer has been closed')
+            if self._frame is not None:
+                self.dropped += 1
+            self._frame = im
+            self._condition.notify()
+
+    def _show(self, im):
         cv2.imshow(self.window_name, im)
-        if cv2.waitKey(100) & 0xFF == ord('q'):
-            pass
+        self.display_fps, self._last_display = _update_rate(
+            self.display_fps, self._last_display)
+        if self.show_fps:
+            cv2.setWindowTitle(
+                self.window_name,
+                '{} processing {:.1f} fps, display {:.1f} fps'.format(
+                    self.window_name, self.processing_fps,
+                    self.display_fps))
+
+    def _run(self):
+        self._create_window()
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._frame is not None or not self._running,
+                    timeout=0.05)
+                if not self._running:
+                    break
+                frame, self._frame = self._frame, None
+            if frame is not None:
+                self._show(frame)
+            cv2.waitKey(1)
+        cv2.destroyWindow(self.window_name)
+
+    def close(self):
+        if self.threaded:
+            with self._condition:
+                self._running = False
+                self._condition.notify()
+            self._thread.join()
+        else:
+            cv2.destroyWindow(self.window_name)
+
+
+def _update_rate(rate, last_time, smoothing=0.9):
+    """Updates a smoothed events per second estimate, returns rate, now"""
+    now = time.perf_counter()
+    if last_time is not None and now > last_time:
+        instant = 1 / (now - last_time)
+        rate = instant if rate == 0 else (
+            smoothing * rate + (1 - smoothing) * instant)
+    return rate, now
 
 
 def mean(ims):
-    im = np.stack(ims, axis=len(np.shape(ims[0])))
-    im = np.float32(im)
-    im = np.mean(im, axis=len(np.shape(ims[0])))
-    return np.uint8(im)
+    """
+    Returns the mean of a sequence of images
+
+    Frames are accumulated one at a time so any iterable of frames, such as
+    read_imgs or a FrameStack, can be averaged without loading it into
+    memory.
+    """
+    return np.uint8(RunningMean().extend(ims).mean)
 
 
 def display(image, title='', resolution=(960, 540)):
@@ -51,17 +174,64 @@ def display(image, title='', resolution=(960, 540)):
 
 
 def plot(im):
+    import matplotlib.pyplot as plt
     plt.figure()
     plt.imshow(im)
     plt.show()
 
 
-def to_uint8(im):
+def to_uint8(im, out=None):
+    """
+    Rescales an image to fill the range 0-255 and converts it to uint8
+
+    Parameters
+    ----------
+    im: input image
+
+    out: optional preallocated uint8 output the same shape as im
+
+    Returns
+    -------
+    out: uint8 image
+    """
+    _check_out(out, np.shape(im), np.uint8)
     im = (im - np.min(im)) / (np.max(im) - np.min(im)) * 255
-    return np.uint8(im)
+    if out is None:
+        return np.uint8(im)
+    np.copyto(out, im, casting='unsafe')
+    return out
+
+
+def _check_out(out, shape, dtype):
+    """
+    Checks a preallocated output array can hold a result.
+
+    OpenCV silently allocates a new array when dst does not match, so a
+    mismatch is raised here instead of losing the output.
+    """
+    if out is None:
+        return
+    if out.shape != tuple(shape) or out.dtype != dtype:
+        raise ValueError(
+            'out has shape {} and dtype {}, expected {} and {}'.format(
+                out.shape, out.dtype, tuple(shape), np.dtype(dtype)))
+
+
+_REDUCED_FLAGS = {
+    (1, 2): cv2.IMREAD_REDUCED_COLOR_2,
+    (1, 4): cv2.IMREAD_REDUCED_COLOR_4,
+    (1, 8): cv2.IMREAD_REDUCED_COLOR_8,
+    (0, 2): cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    (0, 4): cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    (0, 8): cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+# Only JPEG is decoded at the reduced size, other formats are decoded in
+# full even with the reduced flags and OpenCV rounds their size down
+_REDUCED_EXTENSIONS = ('.jpg', '.jpeg')
 
 
-def read_img(filepath, flag=1):
+def read_img(filepath, flag=1, reduction=1, roi=None):
     """
     Reads an image from a filepath.
 
@@ -77,6 +247,17 @@ def read_img(filepath, flag=1):
         0: Loads image in grayscale mode.
         -1: Loads image including alpha channel
 
+    reduction: factor to reduce the width and height by
+        1, 2, 4 or 8. JPEG images read with flag 0 or 1 are decoded at the
+        reduced size, decoding only the DCT coefficients needed. Other
+        images are decoded in full and resized. Either way the result is
+        ceil(height / reduction) by ceil(width / reduction).
+
+    roi: optional BBox of the region to return
+        Given in full resolution pixel coordinates. With a reduction the
+        region is rows ymin // reduction to ceil(ymax / reduction) of the
+        reduced image, and the same for columns.
+
     Returns
     -------
     img: output image
@@ -85,15 +266,93 @@ def read_img(filepath, flag=1):
         Color images will have channels stored in BGR order
 
     """
-    img = cv2.imread(filepath, flag)
+    if reduction not in (1, 2, 4, 8):
+        raise ValueError('reduction must be 1, 2, 4 or 8')
+    if reduction == 1:
+        img = cv2.imread(filepath, flag)
+    elif ((flag, reduction) in _REDUCED_FLAGS
+          and filepath.lower().endswith(_REDUCED_EXTENSIONS)):
+        img = cv2.imread(filepath, _REDUCED_FLAGS[(flag, reduction)])
+    else:
+        img = cv2.imread(filepath, flag)
+        if img is not None:
+            h, w = img.shape[:2]
+            img = cv2.resize(img, (-(-w // reduction), -(-h // reduction)),
+                             interpolation=cv2.INTER_AREA)
+    if img is not None and roi is not None:
+        img = img[roi.ymin // reduction:-(-roi.ymax // reduction),
+                  roi.xmin // reduction:-(-roi.xmax // reduction)].copy()
     return img
 
 
 load = read_img
 read = read_img
 
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp')
+
+
+def _list_files(source, extensions=IMAGE_EXTENSIONS):
+    """Expands a directory, glob pattern or list of files into a file list"""
+    if isinstance(source, (list, tuple)):
+        return list(source)
+    if os.path.isdir(source):
+        files = [os.path.join(source, f) for f in os.listdir(source)
+                 if os.path.splitext(f)[1].lower() in extensions]
+    else:
+        files = glob.glob(source)
+    return sorted(files)
+
+
+def read_imgs(source, flag=1, workers=4, queue_depth=8, reduction=1,
+              roi=None):
+    """
+    Reads a sequence of images, decoding ahead of the consumer.
+
+    Files are decoded on a pool of threads (cv2.imread releases the GIL)
+    while the caller processes earlier frames. Frames are yielded in file
+    order.
+
+    Parameters
+    ----------
+    source: directory, glob pattern or list of filepaths
+        Directories and glob patterns are sorted by filename.
+
+    flag: Specifies how the images are read, see read_img
+
+    workers: number of decoding threads
+
+    queue_depth: maximum number of frames decoded ahead of the consumer
+        Bounds the memory used to queue_depth decoded frames.
+
+    reduction, roi: passed to read_img for every file
+
+    Returns
+    -------
+    generator yielding each decoded image in order
+        Images are None where a file could not be read
 
-def write_img(img, filename):
+    """
+    files = _list_files(source)
+    queue_depth = max(queue_depth, 1)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        try:
+            for filepath in files:
+                pending.append(executor.submit(read_img, filepath, flag,
+                                               reduction, roi))
+                if len(pending) >= queue_depth:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+load_imgs = read_imgs
+
+
+def write_img(img, filename, params=None):
     """
     Saves an image to a specified file.
 
@@ -105,6 +364,16 @@ def write_img(img, filename):
 
     filename: Name of the file
 
+    params: optional encoder parameters
+        Either a flat list such as [cv2.IMWRITE_JPEG_QUALITY, 95] or a dict
+        mapping file extensions to such lists, for example
+        {'.png': [cv2.IMWRITE_PNG_COMPRESSION, 1]}
+
+    Raises
+    ------
+    IOError
+        If OpenCV fails to write the file
+
     Notes
     -----
     Only 8-bit single channel or 3-channel (BGR order) can be saved. If
@@ -116,13 +385,117 @@ def write_img(img, filename):
     fully opaque pixels should have alpha set to 255
 
     """
-    cv2.imwrite(filename, img)
+    if not cv2.imwrite(filename, img, _encoder_params(filename, params)):
+        raise IOError('Could not write image to {}'.format(filename))
+
+
+def _encoder_params(filename, params):
+    """Selects the encoder parameters for the extension of filename"""
+    if params is None:
+        return []
+    if isinstance(params, dict):
+        extension = os.path.splitext(filename)[1].lower()
+        return list(params.get(extension, []))
+    return list(params)
 
 
 save = write_img
 write = write_img
 
 
+class ImageWriter:
+    """
+    Writes images on background threads.
+
+    Encoding and writing happen on a pool of threads (cv2.imwrite releases
+    the GIL) so the caller can carry on processing the next frame.
+
+    Parameters
+    ----------
+    workers: number of writing threads
+
+    queue_depth: maximum number of images waiting to be written
+        write blocks when the queue is full, bounding memory use.
+
+    params: encoder parameters passed to write_img
+        Usually a dict mapping extensions to parameter lists, for example
+        {'.png': [cv2.IMWRITE_PNG_COMPRESSION, 1],
+         '.jpg': [cv2.IMWRITE_JPEG_QUALITY, 90]}
+
+    Notes
+    -----
+    Failed writes are collected and raised as a single IOError by flush or
+    close. Use the writer as a context manager so that every image is
+    written before the block exits.
+    """
+
+    def __init__(self, workers=2, queue_depth=16, params=None):
+        self.params = params
+        self.errors = []
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._slots = threading.BoundedSemaphore(queue_depth)
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def write(self, img, filename, copy=True):
+        """
+        Queues an image to be written.
+
+        Parameters
+        ----------
+        img: Image to be saved
+
+        filename: Name of the file
+
+        copy: copy img before queueing it
+            Only set to False if img will not be modified until it has been
+            written, for example when it is not a reused out= buffer.
+        """
+        if copy:
+            img = img.copy()
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(write_img, img, filename,
+                                           self.params)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._done)
+
+    def _done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+            if future.exception() is not None:
+                self.errors.append(future.exception())
+        self._slots.release()
+
+    def flush(self):
+        """Waits until every queued image is written"""
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.exception()
+        with self._lock:
+            errors, self.errors = self.errors, []
+        if errors:
+            raise IOError('{} images failed to write: {}'.format(
+                len(errors), '; '.join(str(e) for e in errors)))
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
 def width_and_height(img):
     """
     Returns width, height for an image
@@ -1,4 +1,9 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
+import numpy as np
+
+from images.basics import _check_out
 
 __all__ = [
     'BLUE',
@@ -22,6 +27,13 @@ __all__ = [
     'lab_to_bgr',
     'bgr_to_gray',
     'gray_to_bgr',
+    'convert_stack',
+    'bgr_to_hsv_stack',
+    'bgr_to_lab_stack',
+    'hsv_to_bgr_stack',
+    'lab_to_bgr_stack',
+    'bgr_to_gray_stack',
+    'gray_to_bgr_stack',
 ]
 
 BLUE = (255, 0, 0)
@@ -41,25 +53,120 @@ GREEN = (0, 128, 0)
 MAROON = (0, 0, 128)
 
 
-def bgr_to_hsv(im):
-    return cv2.cvtColor(im, cv2.COLOR_BGR2HSV)
+def _convert(im, code, out, channels):
+    """Applies cv2.cvtColor, writing into out if it is given"""
+    shape = im.shape[:2] if channels == 1 else im.shape[:2] + (channels,)
+    _check_out(out, shape, im.dtype)
+    return cv2.cvtColor(im, code, dst=out)
+
+
+def bgr_to_hsv(im, out=None):
+    return _convert(im, cv2.COLOR_BGR2HSV, out, 3)
+
+
+def bgr_to_lab(im, out=None):
+    return _convert(im, cv2.COLOR_BGR2LAB, out, 3)
+
+
+def hsv_to_bgr(im, out=None):
+    return _convert(im, cv2.COLOR_HSV2BGR, out, 3)
+
+
+def lab_to_bgr(im, out=None):
+    return _convert(im, cv2.COLOR_LAB2BGR, out, 3)
+
+
+def bgr_to_gray(im, out=None):
+    return _convert(im, cv2.COLOR_BGR2GRAY, out, 1)
+
+
+def gray_to_bgr(im, out=None):
+    return _convert(im, cv2.COLOR_GRAY2BGR, out, 3)
+
+
+def convert_stack(stack, code, channels, out=None, chunk_size=None,
+                  workers=1):
+    """
+    Converts the colour space of a stack of frames.
+
+    The stack is viewed as one tall image so the whole batch is converted
+    by a few calls to cv2.cvtColor rather than one per frame.
+
+    Parameters
+    ----------
+    stack: array of frames
+        Shape (N, H, W, C) or (N, H, W) for grayscale, must be C contiguous
+
+    code: cv2.COLOR_* conversion code
+
+    channels: number of channels in the output
+
+    out: optional preallocated C contiguous output
+        Shape (N, H, W, channels) or (N, H, W) if channels is 1
+
+    chunk_size: number of frames converted per call
+        Defaults to the whole stack, or an even split between workers
+
+    workers: number of threads converting chunks
+
+    Returns
+    -------
+    out: converted stack
+    """
+    n, h, w = stack.shape[:3]
+    shape = (n, h, w) if channels == 1 else (n, h, w, channels)
+    if out is None:
+        out = np.empty(shape, stack.dtype)
+    else:
+        _check_out(out, shape, stack.dtype)
+    if not (stack.flags.c_contiguous and out.flags.c_contiguous):
+        raise ValueError('stack and out must be C contiguous')
+    if n == 0:
+        return out
+    src = stack.reshape((n * h,) + stack.shape[2:])
+    dst = out.reshape((n * h,) + shape[2:])
+    if chunk_size is None:
+        chunk_size = -(-n // workers)
+    rows = [(start * h, min(start + chunk_size, n) * h)
+            for start in range(0, n, chunk_size)]
+
+    def convert(span):
+        cv2.cvtColor(src[span[0]:span[1]], code, dst=dst[span[0]:span[1]])
+
+    if workers == 1:
+        for span in rows:
+            convert(span)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(convert, rows))
+    return out
+
+
+def bgr_to_hsv_stack(stack, out=None, chunk_size=None, workers=1):
+    return convert_stack(stack, cv2.COLOR_BGR2HSV, 3, out, chunk_size,
+                         workers)
 
 
-def bgr_to_lab(im):
-    return cv2.cvtColor(im, cv2.COLOR_BGR2LAB)
+def bgr_to_lab_stack(stack, out=None, chunk_size=None, workers=1):
+    return convert_stack(stack, cv2.COLOR_BGR2LAB, 3, out, chunk_size,
+                         workers)
 
 
-def hsv_to_bgr(im):
-    return cv2.cvtColor(im, cv2.COLOR_HSV2BGR)
+def hsv_to_bgr_stack(stack, out=None, chunk_size=None, workers=1):
+    return convert_stack(stack, cv2.COLOR_HSV2BGR, 3, out, chunk_size,
+                         workers)
 
 
-def lab_to_bgr(im):
-    return cv2.cvtColor(im, cv2.COLOR_LAB2BGR)
+def lab_to_bgr_stack(stack, out=None, chunk_size=None, workers=1):
+    return convert_stack(stack, cv2.COLOR_LAB2BGR, 3, out, chunk_size,
+                         workers)
 
 
-def bgr_to_gray(im):
-    return cv2.cvtColor(im, cv2.COLOR_BGR2GRAY)
+def bgr_to_gray_stack(stack, out=None, chunk_size=None, workers=1):
+    return convert_stack(stack, cv2.COLOR_BGR2GRAY, 1, out, chunk_size,
+                         workers)
 
 
-def gray_to_bgr(im):
-    return cv2.cvtColor(im, cv2.COLOR_GRAY2BGR)
+def gray_to_bgr_stack(stack, out=None, chunk_size=None, workers=1):
+    return convert_stack(stack, cv2.COLOR_GRAY2BGR, 3, out, chunk_size,
+                         workers)
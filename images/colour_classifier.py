@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+
+import cv2
+import numpy as np
+
+from images.basics import _check_out
+
+__all__ = [
+    'ColourClassifier'
+]
+
+_DEFAULT_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'images')
+
+
+class ColourClassifier:
+    """
+    Labels pixels by colour using a precomputed lookup table.
+
+    Colours are described in LAB, which separates lightness from colour so
+    regions are fairly independent of the lighting. The regions are
+    compiled once into a table indexed by quantised BGR, so classifying a
+    frame is a single gather with no colour space conversion, and its cost
+    does not depend on the number of colours.
+
+    Parameters
+    ----------
+    regions: dict mapping names to (lower, upper) LAB bounds
+        In OpenCV's 8 bit LAB, where L, a and b all run from 0 to 255 and
+        a = b = 128 is grey. If regions overlap the first one listed wins.
+
+    bits: bits kept of each BGR channel, from 1 to 7
+        The table has 2 ** (3 * bits) entries, 6 uses 256 kB and keeps
+        steps of 4 grey levels.
+
+    cache: directory the compiled tables are saved in
+        Tables are keyed by a hash of the regions and bits so they are only
+        computed once. Defaults to ~/.cache/images, False disables it.
+        The table is still compiled if the cache cannot be written.
+
+    Examples
+    --------
+    classifier = ColourClassifier({
+        'blue': ((20, 0, 0), (255, 255, 110)),
+        'red': ((20, 150, 130), (255, 255, 255)),
+        'green': ((20, 0, 130), (255, 110, 255))})
+    labels = classifier.classify(frame)
+    blue = classifier.mask(labels, 'blue')
+    """
+
+    def __init__(self, regions, bits=6, cache=None):
+        if not 1 <= bits <= 7:
+            raise ValueError('bits must be between 1 and 7')
+        if len(regions) > 254:
+            raise ValueError('At most 254 regions can be classified')
+        self.names = list(regions)
+        self.regions = {name: (tuple(int(v) for v in lower),
+                               tuple(int(v) for v in upper))
+                        for name, (lower, upper) in regions.items()}
+        self.bits = bits
+        if cache is None:
+            cache = _DEFAULT_CACHE
+        self.table = self._load_table(cache)
+
+        # The table is looked up as an image with a row for each blue value
+        # and a column for each green and red pair, so cv2.remap does the
+        # gather. cv2.LUT quantises each channel into map coordinates.
+        size = 2 ** bits
+        self._image = self.table.reshape(size, size * size)
+        self._values = (np.arange(256) >> (8 - bits)).astype(np.int16)
+        self._green = self._values << bits
+
+    def _key(self):
+        regions = [[name] + list(self.regions[name]) for name in self.names]
+        description = json.dumps({'regions': regions, 'bits': self.bits})
+        return hashlib.sha1(description.encode()).hexdigest()
+
+    def _load_table(self, cache):
+        filename = None
+        if cache:
+            filename = os.path.join(cache, 'colours_{}.npy'.format(
+                self._key()))
+            if os.path.exists(filename):
+                return np.load(filename)
+        table = self._compile()
+        if filename:
+            # Write then rename so a reader never sees a partial file. The
+            # cache only saves time so failing to write it is not an error
+            temp = filename + '.{}.tmp'.format(os.getpid())
+            try:
+                os.makedirs(cache, exist_ok=True)
+                with open(temp, 'wb') as f:
+                    np.save(f, table)
+                os.replace(temp, filename)
+            except OSError:
+                if os.path.exists(temp):
+                    os.remove(temp)
+        return table
+
+    def _compile(self):
+        """Classifies the centre colour of every quantised BGR cell"""
+        size = 2 ** self.bits
+        step = 256 // size
+        centres = (np.arange(size) * step + step // 2).astype(np.uint8)
+        b, g, r = np.meshgrid(centres, centres, centres, indexing='ij')
+        bgr = np.stack((b.ravel(), g.ravel(), r.ravel()), axis=1)
+        lab = cv2.cvtColor(bgr[:, None, :], cv2.COLOR_BGR2LAB)[:, 0, :]
+        table = np.zeros(len(lab), np.uint8)
+        for label, name in reversed(list(enumerate(self.names, 1))):
+            lower, upper = self.regions[name]
+            inside = np.all((lab >= lower) & (lab <= upper), axis=1)
+            table[inside] = label
+        return table
+
+    def classify(self, img, out=None):
+        """
+        Labels every pixel of a BGR image.
+
+        Parameters
+        ----------
+        img: 8 bit BGR image
+
+        out: optional preallocated 8 bit output the size of img
+
+        Returns
+        -------
+        labels: 8 bit image
+            0 for pixels in no region and i + 1 for pixels in the region
+            names[i]
+        """
+        if img.ndim != 3 or img.shape[2] != 3 or img.dtype != np.uint8:
+            raise ValueError('classify needs an 8 bit BGR image')
+        _check_out(out, img.shape[:2], np.uint8)
+        b, g, r = cv2.split(img)
+        columns = cv2.add(cv2.LUT(g, self._green), cv2.LUT(r, self._values))
+        coords = cv2.merge((columns, cv2.LUT(b, self._values)))
+        return cv2.remap(self._image, coords, None, cv2.INTER_NEAREST,
+                         dst=out)
+
+    def label(self, name):
+        """Value of the region name in the output of classify"""
+        return self.names.index(name) + 1
+
+    def mask(self, labels, name, out=None):
+        """
+        Mask of one region from the output of classify.
+
+        Returns
+        -------
+        mask: 8 bit image, 255 inside the region and 0 elsewhere
+        """
+        _check_out(out, labels.shape, np.uint8)
+        return cv2.compare(labels, self.label(name), cv2.CMP_EQ, dst=out)
+
+    def masks(self, img):
+        """Dict of the mask of every region of a BGR image"""
+        labels = self.classify(img)
+        return {name: self.mask(labels, name) for name in self.names}
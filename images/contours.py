@@ -1,6 +1,7 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
 import numpy as np
-from scipy import optimize as op
 from math import pi, cos, sin
 from __init__ import *
 
@@ -9,6 +10,7 @@ __all__ = [
     "center_of_mass",
     "rotated_bounding_rectangle",
     "sort_contours",
+    "contour_features",
     "find_contour_corners",
     "fit_hex",
     "cut_out_object"
@@ -43,7 +45,7 @@ def center_of_mass(im):
 def rotated_bounding_rectangle(contour):
     rect = cv2.minAreaRect(contour)
     box = cv2.boxPoints(rect)
-    box = np.int0(box)
+    box = np.intp(box)
     dim = np.sort(rect[1])
     info = {'cx': rect[0][0], 'cy': rect[0][1], 'angle': rect[2],
             'length': dim[0], 'width': dim[1], 'box': box}
@@ -64,14 +66,132 @@ def sort_contours(cnts):
     cnts_new: list
         List of input contours sorted by area.
     """
-    area = []
-    for cnt in cnts:
-        area.append(cv2.contourArea(cnt))
-    sorted = np.argsort(area)
-    cnts_new = []
-    for arg in sorted:
-        cnts_new.append(cnts[arg])
-    return cnts_new
+    if len(cnts) == 0:
+        return []
+    points, starts, _ = _concatenate(cnts)
+    area = np.abs(_signed_areas(points, starts, _next_points(points, starts)))
+    return [cnts[arg] for arg in np.argsort(area, kind='stable')]
+
+
+def _concatenate(contours):
+    """All contour points in one (N, 2) float array with contour starts"""
+    lengths = np.array([len(contour) for contour in contours])
+    starts = np.zeros(len(contours), np.intp)
+    np.cumsum(lengths[:-1], out=starts[1:])
+    points = np.concatenate(
+        [np.reshape(contour, (-1, 2)) for contour in contours])
+    return points.astype(np.float64), starts, lengths
+
+
+def _next_points(points, starts):
+    """Index of the next point of each point, wrapping within contours"""
+    following = np.arange(1, len(points) + 1)
+    following[np.append(starts[1:], len(points)) - 1] = starts
+    return following
+
+
+def _signed_areas(points, starts, following):
+    """Shoelace formula summed per contour, positive if anticlockwise"""
+    x, y = points[:, 0], points[:, 1]
+    cross = x * y[following] - x[following] * y
+    return np.add.reduceat(cross, starts) / 2
+
+
+def _shape_features(contours):
+    """Per contour OpenCV features that cannot be vectorised"""
+    rects = np.zeros((len(contours), 5))
+    hulls = []
+    for i, contour in enumerate(contours):
+        (cx, cy), (w, h), angle = cv2.minAreaRect(contour)
+        rects[i] = cx, cy, w, h, angle
+        hulls.append(cv2.convexHull(contour))
+    return rects, hulls
+
+
+def contour_features(contours, workers=1):
+    """
+    Measures many contours at once.
+
+    Areas, perimeters, centroids and bounding boxes are computed for all
+    contours together from their concatenated points. Only the minimum
+    area rectangle and convex hull need OpenCV for each contour, and those
+    can be split across threads.
+
+    Parameters
+    ----------
+    contours: list of contours from find_contours
+
+    workers: number of threads for the per contour calls
+
+    Returns
+    -------
+    features: structured array with one row per contour and fields
+        area: same as cv2.contourArea
+        perimeter: same as cv2.arcLength of the closed contour
+        cx, cy: centroid of the enclosed area, or of the points if the
+            area is 0
+        left, top, width, height: same as cv2.boundingRect
+        rect_cx, rect_cy, rect_width, rect_height, rect_angle: the
+            cv2.minAreaRect
+        circularity: 4 pi area / perimeter ** 2, 1 for a circle
+        solidity: area / area of the convex hull
+    """
+    fields = [('area', np.float64), ('perimeter', np.float64),
+              ('cx', np.float64), ('cy', np.float64),
+              ('left', np.int32), ('top', np.int32),
+              ('width', np.int32), ('height', np.int32),
+              ('rect_cx', np.float64), ('rect_cy', np.float64),
+              ('rect_width', np.float64), ('rect_height', np.float64),
+              ('rect_angle', np.float64),
+              ('circularity', np.float64), ('solidity', np.float64)]
+    features = np.zeros(len(contours), dtype=fields)
+    if len(contours) == 0:
+        return features
+
+    chunks = np.array_split(np.arange(len(contours)), max(workers, 1))
+    chunks = [[contours[i] for i in chunk] for chunk in chunks if len(chunk)]
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        results = list(executor.map(_shape_features, chunks))
+    rects = np.concatenate([rect for rect, _ in results])
+    hulls = [hull for _, hull_list in results for hull in hull_list]
+
+    points, starts, lengths = _concatenate(contours)
+    following = _next_points(points, starts)
+    x, y = points[:, 0], points[:, 1]
+    signed = _signed_areas(points, starts, following)
+    area = np.abs(signed)
+    steps = np.hypot(x[following] - x, y[following] - y)
+    perimeter = np.add.reduceat(steps, starts)
+
+    # Centroid of the polygon, falling back to the mean of the points for
+    # contours that enclose no area such as lines and single points
+    cross = x * y[following] - x[following] * y
+    flat = signed == 0
+    scale = np.where(flat, 1, 6 * signed)
+    cx = np.add.reduceat((x + x[following]) * cross, starts) / scale
+    cy = np.add.reduceat((y + y[following]) * cross, starts) / scale
+    cx[flat] = (np.add.reduceat(x, starts) / lengths)[flat]
+    cy[flat] = (np.add.reduceat(y, starts) / lengths)[flat]
+
+    left = np.minimum.reduceat(x, starts)
+    top = np.minimum.reduceat(y, starts)
+    hull_points, hull_starts, _ = _concatenate(hulls)
+    hull_area = np.abs(_signed_areas(
+        hull_points, hull_starts, _next_points(hull_points, hull_starts)))
+
+    features['area'] = area
+    features['perimeter'] = perimeter
+    features['cx'], features['cy'] = cx, cy
+    features['left'], features['top'] = left, top
+    features['width'] = np.maximum.reduceat(x, starts) - left + 1
+    features['height'] = np.maximum.reduceat(y, starts) - top + 1
+    for i, name in enumerate(('rect_cx', 'rect_cy', 'rect_width',
+                              'rect_height', 'rect_angle')):
+        features[name] = rects[:, i]
+    features['circularity'] = 4 * pi * area / np.where(
+        perimeter > 0, perimeter ** 2, np.inf)
+    features['solidity'] = area / np.where(hull_area > 0, hull_area, np.inf)
+    return features
 
 
 def find_contour_corners(cnt, n, aligned=True):
@@ -115,6 +235,7 @@ def fit_hex(contour):
     Uses scipy.optimize.minimize to minimise the distance between the points
     and the hexagon.
     """
+    from scipy import optimize as op
     (xc, yc), radius = cv2.minEnclosingCircle(contour)
     res = op.minimize(hex_dist, (xc, yc, radius, 0), args=contour)
     (xc, yc, r, theta) = res.x
@@ -1,7 +1,5 @@
 import cv2
 import numpy as np
-import tkinter as tk
-from PIL import Image, ImageTk
 
 __all__ = [
     'BBox',
@@ -99,6 +97,8 @@ class CropPolygon:
         self.setup(im)
 
     def setup(self, im):
+        import tkinter as tk
+        from PIL import Image, ImageTk
         self.master = tk.Tk()
         self.master.wm_title("Crop Polygon")
         self.frame = tk.Frame(self.master)
@@ -185,6 +185,8 @@ class CropCircle:
         self.setup()
 
     def setup(self):
+        import tkinter as tk
+        from PIL import Image, ImageTk
         self.master = tk.Tk()
         self.master.wm_title("Crop Circle")
         self.frame = tk.Frame(self.master)
@@ -1,8 +1,6 @@
 from __init__ import *
 import cv2
 import numpy as np
-from matplotlib import cm
-from scipy import spatial
 
 __all__ = [
     "draw_circle",
@@ -31,8 +29,11 @@ def draw_circles(im, circles, color=YELLOW, thickness=2):
     return im
 
 
-def draw_circles_with_scale(im, circles, values, cmap=cm.viridis, thickness=2):
+def draw_circles_with_scale(im, circles, values, cmap=None, thickness=2):
     assert len(np.shape(im)) == 3, "Image needs to be 3 channel"
+    if cmap is None:
+        from matplotlib import cm
+        cmap = cm.viridis
     for (x, y, r), v in zip(circles, values):
         col = np.multiply(cmap(v), 255)
         cv2.circle(im, (int(x), int(y)), int(r), col, thickness)
@@ -69,6 +70,7 @@ def draw_delaunay_tess(im, points):
         Same shape and type as input image
     """
     assert len(np.shape(im)) == 3, "Image needs to be 3 channel"
+    from scipy import spatial
     tess = spatial.Delaunay(points)
     img = draw_polygons(im,
                         points[tess.simplices],
@@ -96,6 +98,7 @@ def draw_voronoi_cells(im, points):
         Same shape and type as input image
     """
     assert len(np.shape(im)) == 3, "Image needs to be 3 channel"
+    from scipy import spatial
     voro = spatial.Voronoi(points)
     ridge_vertices = voro.ridge_vertices
     new_ridge_vertices = []
@@ -1,14 +1,21 @@
 from __init__ import *
 import cv2
 import numpy as np
-import matplotlib.pyplot as plt
+
+from images import thresholding
+from images.histograms import histogram, histogram_peak_value
 
 __all__ = [
     "find_connected_components",
     "find_circles",
+    "refine_circles",
+    "find_circles_pyramid",
+    "track_circles",
     "extract_biggest_object",
+    "extract_objects",
     "histogram_peak",
     "find_colour",
+    "region_properties",
 ]
 
 
@@ -43,19 +50,63 @@ def find_connected_components(thresh_img, connectivity=4, option=cv2.CV_32S):
 
 
 def extract_biggest_object(img):
-    output = cv2.connectedComponentsWithStats(img, 4, cv2.CV_32S)
-    labels = output[1]
-    stats = output[2]
-    centroids = output[3]
-    stats = stats[1:][:]
-    index = np.argmax(stats[:, cv2.CC_STAT_AREA]) + 1
-    out = np.zeros(np.shape(img))
-    try:
-        out[labels == index] = 255
-    except:
-        print(output[0])
-        display(img)
-    return out
+    """
+    Returns a uint8 image containing only the largest foreground object
+
+    Raises ValueError if img has no foreground pixels.
+    """
+    return extract_objects(img, k=1, full_frame=True)[0][0]
+
+
+def extract_objects(img, k=1, connectivity=4, full_frame=False):
+    """
+    Extracts the k largest objects in a binary image.
+
+    Only the bounding box of each object is compared with its label, so
+    the cost depends on the size of the objects rather than the frame.
+
+    Parameters
+    ----------
+    img: binary single channel image
+
+    k: number of objects to return
+        Fewer are returned if the image contains fewer objects
+
+    connectivity: 4 or 8
+
+    full_frame: return masks the size of img instead of cropped masks
+
+    Returns
+    -------
+    objects: list of (mask, (x, y, w, h)) from largest to smallest
+        mask is a uint8 image which is 255 inside the object, cropped to
+        its bounding box (x, y, w, h) unless full_frame is set
+
+    Raises
+    ------
+    ValueError
+        If img has no foreground pixels
+    """
+    num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(
+        img, connectivity=connectivity, ltype=cv2.CV_32S)
+    if num_labels < 2:
+        raise ValueError('No foreground objects in image')
+    areas = stats[1:, cv2.CC_STAT_AREA]
+    k = min(k, len(areas))
+    largest = np.argpartition(-areas, k - 1)[:k]
+    largest = largest[np.argsort(-areas[largest], kind='stable')] + 1
+
+    objects = []
+    for index in largest:
+        x, y, w, h = stats[index, :4]
+        mask = (labels[y:y + h, x:x + w] == index).astype(np.uint8)
+        mask *= 255
+        if full_frame:
+            full = np.zeros(labels.shape, np.uint8)
+            full[y:y + h, x:x + w] = mask
+            mask = full
+        objects.append((mask, (int(x), int(y), int(w), int(h))))
+    return objects
 
 
 def find_circles(img, min_dist, p1, p2, min_rad, max_rad, dp=1):
@@ -70,29 +121,311 @@ def find_circles(img, min_dist, p1, p2, min_rad, max_rad, dp=1):
     return np.squeeze(circles)
 
 
-def histogram_peak(im, disp=False):
-    if len(np.shape(im)) == 2:
-        data, bins = np.histogram(np.ndarray.flatten(im),
-                                  bins=np.arange(20, 255, 1))
-        peak = bins[np.argmax(data)]
+def _hough(img, min_dist, p1, p2, min_rad, max_rad, dp):
+    """HoughCircles returning an (N, 3) array, empty if nothing is found"""
+    circles = cv2.HoughCircles(img, cv2.HOUGH_GRADIENT, dp, min_dist,
+                               param1=p1, param2=p2, minRadius=min_rad,
+                               maxRadius=max_rad)
+    if circles is None:
+        return np.zeros((0, 3), np.float32)
+    return circles[0]
+
+
+def refine_circles(img, candidates, min_dist, p1, p2, margin=0.2, dp=1):
+    """
+    Refines approximate circles at full resolution.
+
+    HoughCircles is run in a small window around each candidate with the
+    radius limited to within margin of the candidate radius.
+
+    Parameters
+    ----------
+    img: 8 bit grayscale image
+
+    candidates: array of approximate (x, y, r)
+
+    min_dist, p1, p2, dp: as for find_circles
+
+    margin: fractional uncertainty of the candidate positions and radii
+
+    Returns
+    -------
+    circles: array of (x, y, r)
+        Candidates with no circle in their window are dropped, and refined
+        circles closer than min_dist to an earlier one are removed.
+    """
+    height, width = img.shape[:2]
+    refined = []
+    for x, y, r in np.reshape(candidates, (-1, 3)):
+        reach = int(np.ceil(r * (1 + 2 * margin))) + 2
+        x0, y0 = max(int(x) - reach, 0), max(int(y) - reach, 0)
+        x1, y1 = min(int(x) + reach + 1, width), min(int(y) + reach + 1,
+                                                    height)
+        found = _hough(img[y0:y1, x0:x1], 2 * reach, p1, p2,
+                       max(int(r * (1 - margin)), 1),
+                       int(np.ceil(r * (1 + margin))), dp)
+        if len(found):
+            refined.append(found[0] + (x0, y0, 0))
+    if not refined:
+        return np.zeros((0, 3), np.float32)
+
+    kept = []
+    for circle in refined:
+        if all((circle[0] - other[0]) ** 2 + (circle[1] - other[1]) ** 2
+               >= min_dist ** 2 for other in kept):
+            kept.append(circle)
+    return np.array(kept, np.float32)
+
+
+def find_circles_pyramid(img, min_dist, p1, p2, min_rad, max_rad, dp=1,
+                         levels=2, margin=0.2, priors=None):
+    """
+    Finds circles by searching a reduced image and refining at full size.
+
+    The image is halved levels times with cv2.pyrDown, HoughCircles finds
+    candidates there with scaled parameters, and refine_circles locates
+    each one in a small window of the full image. This is much faster than
+    find_circles on large images with large radii.
+
+    Parameters
+    ----------
+    img: 8 bit grayscale image
+
+    min_dist, p1, p2, min_rad, max_rad, dp: as for find_circles
+
+    levels: number of times the image is halved for the coarse search
+
+    margin: fractional uncertainty allowed when refining
+
+    priors: optional array of (x, y, r) used instead of the coarse search,
+        for example the circles found in the previous frame
+
+    Returns
+    -------
+    circles: array of (x, y, r), shape (N, 3)
+    """
+    if priors is None:
+        small = img
+        for _ in range(levels):
+            small = cv2.pyrDown(small)
+        scale = 2 ** levels
+        # HoughCircles has no upper limit when max_rad is 0 or negative
+        coarse_max = max(-(-max_rad // scale), 2) if max_rad > 0 else max_rad
+        candidates = _hough(small, max(min_dist / scale, 1), p1,
+                            max(p2 / scale, 1), max(min_rad // scale, 1),
+                            coarse_max, dp) * scale
+    else:
+        candidates = priors
+    return refine_circles(img, candidates, min_dist, p1, p2, margin, dp)
+
+
+def track_circles(frames, min_dist, p1, p2, min_rad, max_rad, dp=1,
+                  levels=2, margin=0.2, redetect_every=10):
+    """
+    Finds circles in a sequence of frames using earlier frames as priors.
+
+    Each frame is refined around the circles of the previous frame. A full
+    coarse search is made on the first frame, every redetect_every frames
+    and whenever no circles were found, so circles entering the frame are
+    picked up.
+
+    Parameters
+    ----------
+    frames: iterable of 8 bit grayscale images
+
+    Other parameters are as for find_circles_pyramid
+
+    Returns
+    -------
+    generator yielding an (N, 3) array of (x, y, r) for each frame
+    """
+    previous = None
+    for n, frame in enumerate(frames):
+        redetect = (previous is None or len(previous) == 0
+                    or (redetect_every and n % redetect_every == 0))
+        previous = find_circles_pyramid(
+            frame, min_dist, p1, p2, min_rad, max_rad, dp, levels, margin,
+            priors=None if redetect else previous)
+        yield previous
+
+
+def histogram_peak(im, disp=False, value_range=(20, 255), mask=None,
+                   hist=None):
+    """
+    Most common value of an image.
+
+    Parameters
+    ----------
+    im: grayscale or multi-channel image
+
+    disp: plot the histogram
+
+    value_range: (low, high) values considered, high is excluded
+
+    mask: optional 8 bit image, only pixels where mask is nonzero count
+
+    hist: optional histogram from histogram or HistogramAccumulator over
+        value_range, used instead of recounting im
+
+    Returns
+    -------
+    peak: int for a grayscale image or an array with one value per channel
+    """
+    if hist is None:
+        hist = histogram(im, value_range=value_range, mask=mask)
+    peak = histogram_peak_value(hist, value_range)
     if disp:
+        import matplotlib.pyplot as plt
+        values = np.linspace(value_range[0], value_range[1],
+                             np.shape(hist)[-1], endpoint=False)
         plt.figure()
-        plt.plot(bins[:-1], data)
+        plt.plot(values, np.transpose(hist))
         plt.show()
     return peak
 
 
-def find_colour(image, col, t=8, disp=False):
+def find_colour(image, col, t=8, disp=False, hist=None):
     """
     LAB colorspace allows finding colours somewhat independent of
     lighting conditions.
 
     https://www.learnopencv.com/color-spaces-in-opencv-cpp-python/
+
+    hist is an optional histogram of the LAB b channel over (20, 255), for
+    example accumulated over earlier frames, so it is not recounted for
+    every image.
     """
     # Swap to LAB colorspace
     lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
     b = lab[:, :, 2]
     if col == 'Blue':
-        peak = histogram_peak(b, disp=disp)
-        blue = threshold(b, thresh=peak - t, mode=cv2.THRESH_BINARY)
+        peak = histogram_peak(b, disp=disp, hist=hist)
+        blue = thresholding.threshold(b, value=peak - t,
+                                      mode=cv2.THRESH_BINARY)
         return ~blue
+
+
+def region_properties(labels, stats=None, intensity=None, min_area=0,
+                      max_area=None):
+    """
+    Measures every labelled region in one pass over the image.
+
+    Per region sums are accumulated with np.bincount, so the cost does not
+    grow with the number of regions.
+
+    Parameters
+    ----------
+    labels: label image from find_connected_components
+        0 is the background
+
+    stats: optional stats from find_connected_components
+        Saves recomputing the areas and bounding boxes
+
+    intensity: optional image the same height and width as labels
+        Adds the mean intensity of each region, one value per channel
+
+    min_area, max_area: only regions with an area in this range are kept
+        Filtering happens before any other property is computed
+
+    Returns
+    -------
+    props: structured array with one row per kept region and fields
+        label, area
+        left, top, width, height: bounding box
+        cx, cy: centroid
+        orientation: angle of the major axis to the x axis in degrees,
+            measured with y pointing down the image
+        major_axis, minor_axis: lengths of the ellipse with the same
+            second moments
+        eccentricity: 0 for a circle, approaching 1 for a line
+        perimeter: number of region pixels with a 4-neighbour outside it
+        mean_intensity: only if intensity is given
+    """
+    labels = np.asarray(labels)
+    height, width = labels.shape
+    num_labels = int(labels.max()) + 1
+    flat = labels.ravel()
+    if stats is not None:
+        area = stats[:num_labels, cv2.CC_STAT_AREA]
+    else:
+        area = np.bincount(flat, minlength=num_labels)
+    kept = area >= min_area
+    if max_area is not None:
+        kept &= area <= max_area
+    kept[0] = False
+    kept_labels = np.nonzero(kept)[0]
+    n = len(kept_labels)
+
+    # Dropped labels and the background go to an extra bin that is discarded
+    rows = np.full(num_labels, n, np.intp)
+    rows[kept_labels] = np.arange(n)
+    rows = rows[flat]
+
+    def region_sum(weights=None):
+        return np.bincount(rows, weights, minlength=n + 1)[:n]
+
+    xs = np.tile(np.arange(width, dtype=np.float64), height)
+    ys = np.repeat(np.arange(height, dtype=np.float64), width)
+    region_area = area[kept_labels].astype(np.float64)
+    cx = region_sum(xs) / region_area
+    cy = region_sum(ys) / region_area
+    mu20 = region_sum(xs * xs) / region_area - cx ** 2
+    mu02 = region_sum(ys * ys) / region_area - cy ** 2
+    mu11 = region_sum(xs * ys) / region_area - cx * cy
+    del xs, ys
+
+    common = (mu20 + mu02) / 2
+    spread = np.sqrt(((mu20 - mu02) / 2) ** 2 + mu11 ** 2)
+    major = np.maximum(common + spread, 0)
+    minor = np.maximum(common - spread, 0)
+
+    if stats is not None:
+        box = stats[kept_labels, :4]
+    else:
+        left = np.full(num_labels, width)
+        top = np.full(num_labels, height)
+        right = np.zeros(num_labels, np.intp)
+        bottom = np.zeros(num_labels, np.intp)
+        y, x = np.divmod(np.arange(flat.size), width)
+        np.minimum.at(left, flat, x)
+        np.minimum.at(top, flat, y)
+        np.maximum.at(right, flat, x)
+        np.maximum.at(bottom, flat, y)
+        box = np.stack((left, top, right - left + 1, bottom - top + 1),
+                       axis=1)[kept_labels]
+
+    padded = np.pad(labels, 1, mode='constant', constant_values=-1)
+    boundary = ((padded[1:-1, 1:-1] != padded[:-2, 1:-1])
+                | (padded[1:-1, 1:-1] != padded[2:, 1:-1])
+                | (padded[1:-1, 1:-1] != padded[1:-1, :-2])
+                | (padded[1:-1, 1:-1] != padded[1:-1, 2:]))
+    perimeter = np.bincount(rows[boundary.ravel()], minlength=n + 1)[:n]
+
+    fields = [('label', np.int32), ('area', np.int64),
+              ('left', np.int32), ('top', np.int32),
+              ('width', np.int32), ('height', np.int32),
+              ('cx', np.float64), ('cy', np.float64),
+              ('orientation', np.float64), ('major_axis', np.float64),
+              ('minor_axis', np.float64), ('eccentricity', np.float64),
+              ('perimeter', np.int64)]
+    if intensity is not None:
+        channels = 1 if np.ndim(intensity) == 2 else np.shape(intensity)[2]
+        fields.append(('mean_intensity', np.float64, (channels,)))
+    props = np.zeros(n, dtype=fields)
+    props['label'] = kept_labels
+    props['area'] = area[kept_labels]
+    props['left'], props['top'] = box[:, 0], box[:, 1]
+    props['width'], props['height'] = box[:, 2], box[:, 3]
+    props['cx'], props['cy'] = cx, cy
+    props['orientation'] = np.degrees(0.5 * np.arctan2(2 * mu11, mu20 - mu02))
+    props['major_axis'] = 4 * np.sqrt(major)
+    props['minor_axis'] = 4 * np.sqrt(minor)
+    props['eccentricity'] = np.sqrt(
+        1 - np.divide(minor, major, out=np.ones_like(major), where=major > 0))
+    props['perimeter'] = perimeter
+    if intensity is not None:
+        values = np.asarray(intensity, np.float64).reshape(flat.size, -1)
+        for c in range(channels):
+            props['mean_intensity'][:, c] = region_sum(values[:, c]) / \
+                region_area
+    return props
@@ -1,4 +1,5 @@
 from __init__ import *
+from images.gui_base import ParamGui
 import cv2
 import numpy as np
 
@@ -0,0 +1,189 @@
+import cv2
+import numpy as np
+
+__all__ = [
+    'histogram',
+    'HistogramAccumulator',
+    'histogram_peak_value',
+    'otsu_threshold'
+]
+
+# cv2.calcHist counts in float32 which is only exact below 2**24
+_CALCHIST_DTYPES = (np.uint8, np.uint16, np.float32)
+_CALCHIST_MAX_PIXELS = 2 ** 24
+
+
+def _channel_count(im):
+    return 1 if im.ndim == 2 else im.shape[2]
+
+
+def _bincount(channel, bins, value_range, mask):
+    lo, hi = value_range
+    values = channel.ravel()
+    if mask is not None:
+        values = values[mask.ravel() > 0]
+    values = values[(values >= lo) & (values < hi)]
+    if np.issubdtype(values.dtype, np.integer) and bins == hi - lo:
+        index = values.astype(np.intp) - int(lo)
+    else:
+        index = np.floor((values - lo) * (bins / (hi - lo))).astype(np.intp)
+        index = np.minimum(index, bins - 1)
+    return np.bincount(index, minlength=bins)
+
+
+def histogram(im, bins=None, value_range=(0, 256), mask=None):
+    """
+    Histogram of each channel of an image.
+
+    Uses cv2.calcHist for 8 bit, 16 bit and float32 images and an integer
+    np.bincount otherwise. No flattened float copy of the image is made.
+
+    Parameters
+    ----------
+    im: grayscale or multi-channel image
+
+    bins: number of equal width bins
+        Defaults to one bin per integer value in value_range
+
+    value_range: (low, high) values counted, high is excluded
+
+    mask: optional 8 bit image, only pixels where mask is nonzero count
+
+    Returns
+    -------
+    hist: int64 array
+        Shape (bins,) for a grayscale image or (channels, bins)
+    """
+    im = np.asarray(im)
+    lo, hi = value_range
+    bins = int(hi - lo) if bins is None else int(bins)
+    if mask is not None:
+        mask = np.asarray(mask, np.uint8)
+    channels = _channel_count(im)
+    use_calchist = (im.dtype in _CALCHIST_DTYPES
+                    and im.shape[0] * im.shape[1] < _CALCHIST_MAX_PIXELS
+                    and channels <= 4)
+    hist = np.empty((channels, bins), np.int64)
+    for c in range(channels):
+        if use_calchist:
+            hist[c] = cv2.calcHist([im], [c], mask, [bins],
+                                   [lo, hi]).ravel()
+        else:
+            channel = im if im.ndim == 2 else im[:, :, c]
+            hist[c] = _bincount(channel, bins, (lo, hi), mask)
+    return hist[0] if im.ndim == 2 else hist
+
+
+class HistogramAccumulator:
+    """
+    Histogram of a stream of frames.
+
+    Parameters
+    ----------
+    bins, value_range: see histogram
+
+    Examples
+    --------
+    acc = HistogramAccumulator()
+    for frame in read_imgs('frames/*.png', flag=0):
+        acc.update(frame)
+    value = otsu_threshold(acc.histogram)
+    """
+
+    def __init__(self, bins=None, value_range=(0, 256)):
+        lo, hi = value_range
+        self.bins = int(hi - lo) if bins is None else int(bins)
+        self.value_range = value_range
+        self.count = 0
+        self.histogram = None
+
+    def update(self, frame, mask=None):
+        hist = histogram(frame, self.bins, self.value_range, mask)
+        if self.histogram is None:
+            self.histogram = hist
+        elif hist.shape != self.histogram.shape:
+            raise ValueError('Frame has {} channels, expected {}'.format(
+                1 if hist.ndim == 1 else len(hist),
+                1 if self.histogram.ndim == 1 else len(self.histogram)))
+        else:
+            self.histogram += hist
+        self.count += 1
+        return self
+
+    def extend(self, frames):
+        for frame in frames:
+            self.update(frame)
+        return self
+
+    def merge(self, other):
+        if other.histogram is None:
+            return self
+        if (other.bins, tuple(other.value_range)) != \
+                (self.bins, tuple(self.value_range)):
+            raise ValueError('Histograms have different bins')
+        if self.histogram is None:
+            self.histogram = other.histogram.copy()
+        else:
+            self.histogram += other.histogram
+        self.count += other.count
+        return self
+
+    def reset(self):
+        self.count = 0
+        self.histogram = None
+
+    @property
+    def edges(self):
+        return np.linspace(self.value_range[0], self.value_range[1],
+                           self.bins + 1)
+
+
+def histogram_peak_value(hist, value_range=(0, 256)):
+    """
+    Value of the most common bin of a histogram.
+
+    Returns
+    -------
+    peak: lower edge of the largest bin
+        An array with one value per channel for (channels, bins) input
+    """
+    hist = np.asarray(hist)
+    lo, hi = value_range
+    width = (hi - lo) / hist.shape[-1]
+    peak = lo + np.argmax(hist, axis=-1) * width
+    if float(width).is_integer():
+        peak = np.asarray(peak).astype(np.int64)
+    return peak[()] if np.ndim(peak) == 0 else peak
+
+
+def otsu_threshold(hist, value_range=(0, 256)):
+    """
+    Otsu threshold of a single channel histogram.
+
+    Gives the same value as cv2.threshold with cv2.THRESH_OTSU on the
+    image the histogram was made from, so one histogram can be reused, for
+    example threshold(im, otsu_threshold(acc.histogram)).
+
+    Returns
+    -------
+    value: threshold, pixels above it are foreground
+    """
+    hist = np.asarray(hist, np.float64)
+    if hist.ndim != 1:
+        raise ValueError('otsu_threshold needs a single channel histogram')
+    lo, hi = value_range
+    centres = lo + np.arange(len(hist)) * (hi - lo) / len(hist)
+    weight = np.cumsum(hist)
+    total = weight[-1]
+    if total == 0:
+        return lo
+    mean = np.cumsum(hist * centres)
+    background = weight[:-1]
+    foreground = total - background
+    valid = (background > 0) & (foreground > 0)
+    between = np.zeros(len(hist) - 1)
+    mu_b = mean[:-1][valid] / background[valid]
+    mu_f = (mean[-1] - mean[:-1][valid]) / foreground[valid]
+    between[valid] = background[valid] * foreground[valid] \
+        * (mu_b - mu_f) ** 2
+    return centres[np.argmax(between)]
@@ -1,10 +1,64 @@
+import functools
+
 import cv2
 import numpy as np
 
-__all__ = ['dilate', 'erode', 'closing', 'opening']
+from images.basics import _check_out
+
+__all__ = [
+    'structuring_element',
+    'dilate',
+    'erode',
+    'closing',
+    'opening',
+    'gradient',
+    'top_hat',
+    'black_hat',
+    'hit_or_miss',
+    'reconstruct'
+]
+
 
+@functools.lru_cache(maxsize=64)
+def _cached_element(kernel, kernel_type):
+    element = cv2.getStructuringElement(kernel_type, kernel)
+    element.flags.writeable = False
+    return element
 
-def dilate(img, kernel=(3, 3), kernel_type=None, iterations=1):
+
+def structuring_element(kernel=(3, 3), kernel_type=None):
+    """
+    Returns a cached uint8 structuring element.
+
+    Parameters
+    ----------
+    kernel: tuple giving (width, height) for kernel, or an int for a square
+        An array is returned unchanged as uint8 so custom elements can be
+        passed wherever a kernel is accepted.
+
+    kernel_type: cv2.MORPH_RECT, cv2.MORPH_ELLIPSE or cv2.MORPH_CROSS
+        None gives a rectangle
+
+    Returns
+    -------
+    element: read only uint8 array of shape (height, width)
+
+    Notes
+    -----
+    OpenCV recognises all ones rectangular elements and applies them as
+    separate row and column passes, and folds iterations into one larger
+    rectangle, so large rectangles cost little more than small ones.
+    """
+    if isinstance(kernel, np.ndarray):
+        return kernel.astype(np.uint8, copy=False)
+    if np.size(kernel) == 1:
+        kernel = (int(kernel), int(kernel))
+    if kernel_type is None:
+        kernel_type = cv2.MORPH_RECT
+    return _cached_element(tuple(int(k) for k in kernel), kernel_type)
+
+
+def dilate(img, kernel=(3, 3), kernel_type=None, iterations=1, out=None):
     """
     Dilates an image by using a specific structuring element.
 
@@ -20,6 +74,9 @@ def dilate(img, kernel=(3, 3), kernel_type=None, iterations=1):
     kernel: tuple giving (width, height) for kernel
         Width and height should be positive and odd
 
+    out: optional preallocated output image
+        Same size and type as img
+
     Returns
     -------
     out: output image
@@ -34,15 +91,13 @@ def dilate(img, kernel=(3, 3), kernel_type=None, iterations=1):
     any of the pixels under the kernel is 1.
 
     """
-    if kernel_type is not None:
-        kernel = cv2.getStructuringElement(kernel_type, kernel)
-    else:
-        kernel = np.ones(kernel)
-    out = cv2.dilate(img, kernel, iterations=iterations)
+    kernel = structuring_element(kernel, kernel_type)
+    _check_out(out, img.shape, img.dtype)
+    out = cv2.dilate(img, kernel, dst=out, iterations=iterations)
     return out
 
 
-def erode(img, kernel=(3, 3), kernel_type=None, iterations=1):
+def erode(img, kernel=(3, 3), kernel_type=None, iterations=1, out=None):
     """
     Erodes an image by using a specific structuring element.
 
@@ -58,6 +113,9 @@ def erode(img, kernel=(3, 3), kernel_type=None, iterations=1):
     kernel: tuple giving (width, height) for kernel
         Width and height should be positive and odd
 
+    out: optional preallocated output image
+        Same size and type as img
+
     Returns
     -------
     out: output image
@@ -74,15 +132,14 @@ def erode(img, kernel=(3, 3), kernel_type=None, iterations=1):
 
 
     """
-    if kernel_type is not None:
-        kernel = cv2.getStructuringElement(kernel_type, kernel)
-    else:
-        kernel = np.ones(kernel)
-    out = cv2.erode(img, kernel, iterations)
+    kernel = structuring_element(kernel, kernel_type)
+    _check_out(out, img.shape, img.dtype)
+    out = cv2.erode(img, kernel, dst=out, iterations=iterations)
     return out
 
 
-def closing(img, kernel=(3, 3)):
+def closing(img, kernel=(3, 3), kernel_type=None, iterations=1,
+            out=None):
     """
     Performs a dilation followed by an erosion
 
@@ -94,17 +151,26 @@ def closing(img, kernel=(3, 3)):
     kernel: tuple giving (width, height) for kernel
         Width and height should be positive and odd
 
+    kernel_type: Either None or cv2.MORPH_?????
+
+    out: optional preallocated output image
+        Same size and type as img
+
     Returns
     -------
     out: output image
         Same size and type as img
 
     """
-    out = cv2.morphologyEx(img, cv2.MORPH_CLOSE, kernel)
+    kernel = structuring_element(kernel, kernel_type)
+    _check_out(out, img.shape, img.dtype)
+    out = cv2.morphologyEx(img, cv2.MORPH_CLOSE, kernel, dst=out,
+                           iterations=iterations)
     return out
 
 
-def opening(img, kernel=(3, 3), kernel_type=None, iterations=1):
+def opening(img, kernel=(3, 3), kernel_type=None, iterations=1,
+            out=None):
     """
     Performs an erosion followed by a dilation
 
@@ -118,15 +184,143 @@ def opening(img, kernel=(3, 3), kernel_type=None, iterations=1):
 
     kernel_type: Either None or cv2.MORPH_?????
 
+    out: optional preallocated output image
+        Same size and type as img
+
     Returns
     -------
     out: output image
         Same size and type as img
 
     """
-    if kernel_type is not None:
-        kernel = cv2.getStructuringElement(kernel_type, kernel)
-    else:
-        kernel = np.ones(kernel)
-    out = cv2.morphologyEx(img, cv2.MORPH_OPEN, kernel, iterations=iterations)
+    kernel = structuring_element(kernel, kernel_type)
+    _check_out(out, img.shape, img.dtype)
+    out = cv2.morphologyEx(img, cv2.MORPH_OPEN, kernel, dst=out,
+                           iterations=iterations)
     return out
+
+
+def _morphology(img, op, kernel, kernel_type, iterations, out):
+    kernel = structuring_element(kernel, kernel_type)
+    _check_out(out, img.shape, img.dtype)
+    return cv2.morphologyEx(img, op, kernel, dst=out, iterations=iterations)
+
+
+def gradient(img, kernel=(3, 3), kernel_type=None, iterations=1, out=None):
+    """
+    Difference between the dilation and erosion of an image
+
+    Gives the outline of objects.
+
+    Parameters
+    ----------
+    img: input image
+        Number of channels can be arbitrary
+
+    kernel: tuple giving (width, height) for kernel
+
+    kernel_type: Either None or cv2.MORPH_?????
+
+    out: optional preallocated output image
+        Same size and type as img
+
+    Returns
+    -------
+    out: output image
+        Same size and type as img
+    """
+    return _morphology(img, cv2.MORPH_GRADIENT, kernel, kernel_type,
+                       iterations, out)
+
+
+def top_hat(img, kernel=(3, 3), kernel_type=None, iterations=1, out=None):
+    """
+    Difference between an image and its opening
+
+    Keeps bright features smaller than the kernel, removing an uneven
+    background. Parameters are the same as gradient.
+    """
+    return _morphology(img, cv2.MORPH_TOPHAT, kernel, kernel_type,
+                       iterations, out)
+
+
+def black_hat(img, kernel=(3, 3), kernel_type=None, iterations=1, out=None):
+    """
+    Difference between the closing of an image and the image
+
+    Keeps dark features smaller than the kernel. Parameters are the same
+    as gradient.
+    """
+    return _morphology(img, cv2.MORPH_BLACKHAT, kernel, kernel_type,
+                       iterations, out)
+
+
+def hit_or_miss(img, kernel, out=None):
+    """
+    Finds pixels whose neighbourhood matches a pattern
+
+    Parameters
+    ----------
+    img: binary single channel uint8 image
+
+    kernel: int array of the pattern
+        1 where the pixel must be foreground, -1 where it must be
+        background and 0 where it does not matter
+
+    out: optional preallocated output image
+        Same size and type as img
+
+    Returns
+    -------
+    out: binary image
+        255 where the pattern matches
+    """
+    _check_out(out, img.shape, img.dtype)
+    return cv2.morphologyEx(img, cv2.MORPH_HITMISS,
+                            np.asarray(kernel, dtype=np.int32), dst=out)
+
+
+def reconstruct(marker, mask, kernel=(3, 3), kernel_type=None,
+                max_iterations=None, out=None):
+    """
+    Morphological reconstruction by dilation
+
+    The marker is repeatedly dilated and limited by the mask until it stops
+    changing. The result keeps the objects in mask that are touched by the
+    marker, with their full shape.
+
+    Parameters
+    ----------
+    marker: seed image
+        Same size and type as mask, marker <= mask
+
+    mask: image limiting the reconstruction
+
+    kernel: tuple giving (width, height) for kernel
+        (3, 3) gives 8 connectivity, cv2.MORPH_CROSS 4 connectivity
+
+    kernel_type: Either None or cv2.MORPH_?????
+
+    max_iterations: optional limit on the number of dilations
+
+    out: optional preallocated output image
+        Same size and type as mask
+
+    Returns
+    -------
+    out: reconstructed image
+        Same size and type as mask
+    """
+    kernel = structuring_element(kernel, kernel_type)
+    _check_out(out, mask.shape, mask.dtype)
+    current = cv2.min(marker, mask, dst=out)
+    previous = np.empty_like(current)
+    iteration = 0
+    while max_iterations is None or iteration < max_iterations:
+        previous[...] = current
+        cv2.dilate(previous, kernel, dst=current)
+        cv2.min(current, mask, dst=current)
+        iteration += 1
+        if np.array_equal(current, previous):
+            break
+    return current
@@ -0,0 +1,275 @@
+import multiprocessing as mp
+import os
+import traceback
+from collections import deque
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+
+import numpy as np
+
+__all__ = [
+    'FrameExecutor',
+    'parallel_map'
+]
+
+
+def _worker(func, kwargs, names, shape, dtype, conn):
+    # Workers share the parent's resource tracker so attaching by name does
+    # not take ownership, the parent unlinks the blocks in close()
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+    frames = [np.ndarray(shape, dtype, buffer=shm.buf) for shm in blocks]
+    try:
+        while True:
+            try:
+                task = conn.recv()
+            except EOFError:
+                break
+            if task is None:
+                break
+            index, slot = task
+            try:
+                result = func(frames[slot], **kwargs)
+                conn.send((index, True, result))
+            except Exception:
+                conn.send((index, False, traceback.format_exc()))
+    finally:
+        del frames
+        for shm in blocks:
+            shm.close()
+
+
+class FrameExecutor:
+    """
+    Applies a function to frames in parallel worker processes.
+
+    Frames are copied once into blocks of shared memory and the workers
+    read them in place, so frames are never pickled. Only the results are
+    sent back, through a pipe for each worker, so func should return
+    something small compared to a frame, such as circles, contours or
+    properties.
+
+    Parameters
+    ----------
+    func: function called as func(frame, **kwargs)
+        Must be importable by the workers, i.e. defined at module level.
+        The frame is a view of shared memory, copy it if it is kept.
+
+    frame_shape: shape of every frame
+
+    dtype: dtype of every frame
+
+    workers: number of worker processes
+        Defaults to os.cpu_count()
+
+    max_pending: number of shared memory frame slots
+        At most this many frames are queued or being processed, submitting
+        more blocks until a result is collected. Defaults to 2 * workers.
+
+    max_retries: times a frame is resubmitted after its worker dies
+        If the frame kills a worker more often than this a RuntimeError is
+        raised instead of retrying it again.
+
+    kwargs: dict of extra keyword arguments for func
+
+    Notes
+    -----
+    Use as a context manager, or call close(), so that the shared memory is
+    released.
+    """
+
+    def __init__(self, func, frame_shape, dtype=np.uint8, workers=None,
+                 max_pending=None, max_retries=1, kwargs=None):
+        self.func = func
+        self.frame_shape = tuple(frame_shape)
+        self.dtype = np.dtype(dtype)
+        self.kwargs = kwargs or {}
+        self.num_workers = workers or os.cpu_count()
+        self.max_retries = max_retries
+        max_pending = max_pending or 2 * self.num_workers
+        nbytes = max(int(np.prod(self.frame_shape)) * self.dtype.itemsize, 1)
+
+        self._context = mp.get_context()
+        self._blocks = [shared_memory.SharedMemory(create=True, size=nbytes)
+                        for _ in range(max_pending)]
+        self._frames = [np.ndarray(self.frame_shape, self.dtype,
+                                   buffer=shm.buf) for shm in self._blocks]
+        self._free = deque(range(max_pending))
+        self._workers = {}
+        self._next_worker = 0
+        self._in_flight = {}
+        self._retries = {}
+        self._finished = {}
+        self._submitted = 0
+        for _ in range(self.num_workers):
+            self._start_worker()
+
+    def _start_worker(self):
+        # Each worker has its own pipe so a worker dying part way through
+        # sending a result cannot block the others
+        conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker,
+            args=(self.func, self.kwargs,
+                  [shm.name for shm in self._blocks],
+                  self.frame_shape, self.dtype, child_conn),
+            daemon=True)
+        process.start()
+        child_conn.close()
+        worker_id = self._next_worker
+        self._next_worker += 1
+        self._workers[worker_id] = (process, conn)
+
+    def _dispatch(self, index, slot):
+        load = {worker_id: 0 for worker_id in self._workers}
+        for _, worker_id in self._in_flight.values():
+            load[worker_id] += 1
+        worker_id = min(load, key=load.get)
+        self._in_flight[index] = (slot, worker_id)
+        self._workers[worker_id][1].send((index, slot))
+
+    def _submit(self, frame):
+        """
+        Copies a frame into shared memory and queues it for processing.
+
+        Blocks while all the frame slots are in use.
+        """
+        frame = np.asarray(frame)
+        if frame.shape != self.frame_shape or frame.dtype != self.dtype:
+            raise ValueError(
+                'Frame {} has shape {} and dtype {}, expected {} and '
+                '{}'.format(self._submitted, frame.shape, frame.dtype,
+                            self.frame_shape, self.dtype))
+        while not self._free:
+            self._collect()
+        slot = self._free.popleft()
+        self._frames[slot][...] = frame
+        self._dispatch(self._submitted, slot)
+        self._submitted += 1
+
+    def _collect(self, timeout=1):
+        """Waits for results, restarting any workers that have died"""
+        conns = [conn for _, conn in self._workers.values()]
+        sentinels = [process.sentinel for process, _ in self._workers.values()]
+        for ready in wait(conns + sentinels, timeout):
+            if ready not in conns:
+                continue
+            try:
+                index, ok, result = ready.recv()
+            except (EOFError, OSError):
+                continue
+            slot, _ = self._in_flight.pop(index)
+            self._free.append(slot)
+            self._finished[index] = (ok, result)
+        self._check_workers()
+
+    def _check_workers(self):
+        dead = [worker_id for worker_id, (process, _)
+                in self._workers.items() if not process.is_alive()]
+        for worker_id in dead:
+            self._workers.pop(worker_id)[1].close()
+            self._start_worker()
+        lost = [(index, slot) for index, (slot, owner)
+                in self._in_flight.items() if owner in dead]
+        for index, _ in lost:
+            del self._in_flight[index]
+        for index, slot in sorted(lost):
+            self._retries[index] = self._retries.get(index, 0) + 1
+            if self._retries[index] > self.max_retries:
+                self._free.append(slot)
+                self._finished[index] = (
+                    False, 'Frame {} crashed a worker {} times'.format(
+                        index, self._retries[index]))
+            else:
+                self._dispatch(index, slot)
+
+    def _pop(self, index):
+        while index not in self._finished:
+            self._collect()
+        ok, result = self._finished.pop(index)
+        self._retries.pop(index, None)
+        if not ok:
+            raise RuntimeError(
+                'Processing frame {} failed:\n{}'.format(index, result))
+        return result
+
+    def map(self, frames):
+        """
+        Applies func to every frame, yielding results in order.
+
+        Parameters
+        ----------
+        frames: iterable of frames with the executor's shape and dtype
+            A ValueError is raised for any other frame. Consumed lazily so frames can come from read_imgs, a
+            FrameStack or a VideoReader.
+
+        Returns
+        -------
+        generator yielding func(frame) for each frame in order
+        """
+        next_result = self._submitted
+        for frame in frames:
+            self._submit(frame)
+            while next_result in self._finished:
+                yield self._pop(next_result)
+                next_result += 1
+        while next_result < self._submitted:
+            yield self._pop(next_result)
+            next_result += 1
+
+    def close(self):
+        for process, conn in self._workers.values():
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+        for process, conn in self._workers.values():
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+            conn.close()
+        self._workers = {}
+        self._frames = []
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def parallel_map(func, frames, workers=None, max_pending=None, **kwargs):
+    """
+    Applies func to every frame using worker processes.
+
+    The frame shape and dtype are taken from the first frame.
+
+    Parameters
+    ----------
+    func: module level function called as func(frame, **kwargs)
+
+    frames: iterable of same shaped frames
+
+    workers, max_pending: see FrameExecutor
+
+    Returns
+    -------
+    results: list of func(frame) for each frame in order
+    """
+    frames = iter(frames)
+    try:
+        first = np.asarray(next(frames))
+    except StopIteration:
+        return []
+
+    def all_frames():
+        yield first
+        for frame in frames:
+            yield frame
+
+    with FrameExecutor(func, first.shape, first.dtype, workers=workers,
+                       max_pending=max_pending, kwargs=kwargs) as executor:
+        return list(executor.map(all_frames()))
@@ -0,0 +1,171 @@
+import inspect
+import time
+
+import numpy as np
+
+__all__ = [
+    'Pipeline'
+]
+
+
+class _Stage:
+    def __init__(self, name, func, inputs, kwargs, reuse):
+        self.name = name
+        self.func = func
+        self.inputs = inputs
+        self.kwargs = kwargs
+        self.reuse = reuse
+        self.buffer = None
+        self.calls = 0
+        self.total_time = 0.0
+
+
+def _accepts_out(func):
+    try:
+        return 'out' in inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+class Pipeline:
+    """
+    Chains image functions and applies them to a sequence of frames.
+
+    Each stage is called with the result of the previous stage, or with the
+    named results given in inputs. The input frame is available as 'frame'.
+    Stages whose function takes an out argument write into the array they
+    returned for the previous frame, so a steady state loop does not
+    allocate new intermediate images.
+
+    Examples
+    --------
+    pipe = Pipeline()
+    pipe.add('blur', gaussian_blur, kernel=(3, 3))
+    pipe.add('thresh', adaptive_threshold, block_size=53, constant=-26)
+    pipe.add('contours', find_contours)
+    pipe.add('drawn', lambda im, c: draw_contours(gray_to_bgr(im), c),
+             inputs=('frame', 'contours'))
+    for drawn in pipe.run(read_imgs('frames/*.png', flag=0)):
+        ...
+
+    Notes
+    -----
+    Results are overwritten by the next frame when their stage reuses its
+    buffer. Copy any result that needs to be kept.
+    """
+
+    def __init__(self):
+        self.stages = []
+        self._frame_type = None
+
+    def add(self, name, func, inputs=None, reuse=None, **kwargs):
+        """
+        Appends a stage to the pipeline.
+
+        Parameters
+        ----------
+        name: name of the stage's result
+            Used by later stages in inputs and in the timings
+
+        func: function to call
+            Called as func(*inputs, **kwargs)
+
+        inputs: tuple of names of earlier results
+            Defaults to the result of the previous stage
+
+        reuse: write the result into the previous frame's result
+            Defaults to True if func has an out argument
+
+        kwargs: extra keyword arguments passed to func
+
+        Returns
+        -------
+        self so calls can be chained
+        """
+        names = ['frame'] + [stage.name for stage in self.stages]
+        if name in names:
+            raise ValueError('Stage name {} is already used'.format(name))
+        if inputs is None:
+            inputs = (names[-1],)
+        elif isinstance(inputs, str):
+            inputs = (inputs,)
+        for input_name in inputs:
+            if input_name not in names:
+                raise ValueError('Unknown input {}'.format(input_name))
+        if reuse is None:
+            reuse = _accepts_out(func)
+        self.stages.append(_Stage(name, func, tuple(inputs), kwargs, reuse))
+        return self
+
+    def process(self, frame, outputs=None):
+        """
+        Runs every stage on one frame.
+
+        Parameters
+        ----------
+        frame: input image
+
+        outputs: name or list of names of the results to return
+            Defaults to the result of the last stage
+
+        Returns
+        -------
+        The requested result, or a list of results if outputs is a list
+        """
+        # Buffers only fit frames of the same shape and dtype
+        frame_type = (np.shape(frame), getattr(frame, 'dtype', None))
+        if frame_type != self._frame_type:
+            for stage in self.stages:
+                stage.buffer = None
+            self._frame_type = frame_type
+
+        results = {'frame': frame}
+        for stage in self.stages:
+            args = [results[name] for name in stage.inputs]
+            start = time.perf_counter()
+            if stage.buffer is not None:
+                result = stage.func(*args, out=stage.buffer, **stage.kwargs)
+            else:
+                result = stage.func(*args, **stage.kwargs)
+                if stage.reuse and isinstance(result, np.ndarray):
+                    stage.buffer = result
+            stage.total_time += time.perf_counter() - start
+            stage.calls += 1
+            results[stage.name] = result
+
+        if outputs is None:
+            return results[self.stages[-1].name]
+        if isinstance(outputs, str):
+            return results[outputs]
+        return [results[name] for name in outputs]
+
+    def run(self, frames, outputs=None):
+        """
+        Runs the pipeline over an iterable of frames.
+
+        Returns
+        -------
+        generator yielding the result of process for each frame
+        """
+        for frame in frames:
+            yield self.process(frame, outputs)
+
+    def timings(self):
+        """
+        Returns the time spent in each stage.
+
+        Returns
+        -------
+        timings: dict
+            Maps stage names to dicts of 'calls', 'total' and 'mean' where
+            times are in seconds.
+        """
+        return {stage.name: {'calls': stage.calls,
+                             'total': stage.total_time,
+                             'mean': stage.total_time / max(stage.calls, 1)}
+                for stage in self.stages}
+
+    def reset_timings(self):
+        for stage in self.stages:
+            stage.calls = 0
+            stage.total_time = 0.0
@@ -0,0 +1,122 @@
+import json
+import os
+import struct
+
+from images.basics import _list_files
+
+__all__ = [
+    'probe_img',
+    'build_manifest'
+]
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+_PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+_MODE_BITS = {'1': 1, 'I': 32, 'F': 32}
+
+
+def probe_img(filepath):
+    """
+    Reads the dimensions of an image from its file header.
+
+    The pixel data is not decoded so this is much faster than read_img for
+    finding the size of a large number of images.
+
+    Parameters
+    ----------
+    filepath: filepath of the image
+
+    Returns
+    -------
+    info: dict
+        'width', 'height', 'channels' and 'bit_depth' (bits per channel)
+        as stored in the file. Palette images report 1 channel.
+    """
+    with open(filepath, 'rb') as f:
+        head = f.read(26)
+    if head[:8] == _PNG_SIGNATURE and head[12:16] == b'IHDR':
+        width, height, bit_depth, color_type = struct.unpack(
+            '>IIBB', head[16:26])
+        return {'width': width, 'height': height,
+                'channels': _PNG_CHANNELS[color_type],
+                'bit_depth': bit_depth}
+
+    from PIL import Image
+    with Image.open(filepath) as im:
+        width, height = im.size
+        mode = im.mode
+        channels = len(im.getbands())
+        bit_depth = _MODE_BITS.get(mode, 16 if mode.startswith('I;16') else 8)
+        tags = getattr(im, 'tag_v2', None)
+        if tags is not None and 258 in tags:
+            bits = tags[258]
+            bit_depth = bits[0] if isinstance(bits, tuple) else bits
+    return {'width': width, 'height': height, 'channels': channels,
+            'bit_depth': bit_depth}
+
+
+def build_manifest(source, cache=None):
+    """
+    Probes every image in a directory, reusing cached results.
+
+    Parameters
+    ----------
+    source: directory, glob pattern or list of filepaths
+
+    cache: filepath of the json cache
+        Defaults to .images_manifest.json inside source when source is a
+        directory. Set to False to disable caching.
+
+    Returns
+    -------
+    manifest: dict
+        Maps each filepath to the probe_img dict for that file with its
+        'mtime' and 'size' added.
+
+    Notes
+    -----
+    Files are only probed again if their modification time or size has
+    changed since the cache was written. Entries for deleted files are
+    dropped. A cache that cannot be read or written is ignored.
+    """
+    if cache is None and isinstance(source, str) and os.path.isdir(source):
+        cache = os.path.join(source, '.images_manifest.json')
+    cached = {}
+    if cache and os.path.exists(cache):
+        # An unreadable cache only means every file is probed again
+        try:
+            with open(cache) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            pass
+        if not isinstance(cached, dict):
+            cached = {}
+
+    manifest = {}
+    changed = False
+    for filepath in _list_files(source):
+        stat = os.stat(filepath)
+        entry = cached.get(filepath)
+        if (entry is None or entry['mtime'] != stat.st_mtime
+                or entry['size'] != stat.st_size):
+            entry = probe_img(filepath)
+            entry['mtime'] = stat.st_mtime
+            entry['size'] = stat.st_size
+            changed = True
+        manifest[filepath] = entry
+
+    if cache and (changed or len(manifest) != len(cached)):
+        _write_cache(cache, manifest)
+    return manifest
+
+
+def _write_cache(cache, manifest):
+    # Write then rename so a reader never sees a partial file, failing to
+    # write the cache is not an error
+    temp = cache + '.{}.tmp'.format(os.getpid())
+    try:
+        with open(temp, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(temp, cache)
+    except OSError:
+        if os.path.exists(temp):
+            os.remove(temp)
@@ -0,0 +1,183 @@
+import functools
+import inspect
+import json
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+import numpy as np
+
+__all__ = [
+    'enable_profiling',
+    'disable_profiling',
+    'reset_profiling',
+    'profiling_stats',
+    'profiling_report'
+]
+
+_stats = {}
+_patched = []
+_lock = threading.Lock()
+
+
+class _FunctionStats:
+    def __init__(self, max_samples):
+        self.calls = 0
+        self.total = 0.0
+        self.durations = deque(maxlen=max_samples)
+        self.shapes = Counter()
+
+    def record(self, duration, shape):
+        self.calls += 1
+        self.total += duration
+        self.durations.append(duration)
+        if shape is not None:
+            self.shapes[shape] += 1
+
+    def summary(self):
+        durations = np.array(self.durations)
+        return {'calls': self.calls,
+                'total': self.total,
+                'mean': self.total / self.calls,
+                'p95': float(np.percentile(durations, 95)),
+                'shapes': [[list(shape), count] for shape, count
+                           in self.shapes.most_common(3)]}
+
+
+def _input_shape(args):
+    for arg in args:
+        if isinstance(arg, np.ndarray):
+            return arg.shape
+    return None
+
+
+def _instrument(name, func, max_samples):
+    stats = _stats.setdefault(name, _FunctionStats(max_samples))
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            duration = time.perf_counter() - start
+            with _lock:
+                stats.record(duration, _input_shape(args))
+
+    return wrapper
+
+
+def _package_modules():
+    """Loaded modules of the package, including the __init__ alias"""
+    return [module for name, module in list(sys.modules.items())
+            if module is not None and (name == 'images'
+                                       or name.startswith('images.')
+                                       or name == '__init__')]
+
+
+def enable_profiling(max_samples=10000):
+    """
+    Starts recording timings for every exported function in the package.
+
+    The functions listed in the __all__ of each loaded submodule are
+    replaced by timing wrappers in every loaded module that has imported
+    them, including scripts that did from images import *, so calls
+    between modules are recorded too. Disabled profiling has no overhead
+    because the original functions are put back.
+
+    Parameters
+    ----------
+    max_samples: number of recent calls kept per function for the p95
+
+    Notes
+    -----
+    Times are inclusive, a function calling other exported functions
+    includes their time. Only module level names are replaced, so
+    functions stored elsewhere before profiling was enabled, for example
+    in a list, a dict or a Pipeline stage, are not recorded. Modules
+    imported after profiling is enabled, such as the guis, are not
+    instrumented.
+    """
+    if _patched:
+        return
+    modules = _package_modules()
+    wrappers = {}
+    for module in modules:
+        if module.__name__ == __name__:
+            continue
+        for name in getattr(module, '__all__', []):
+            func = getattr(module, name, None)
+            if inspect.isfunction(func) and id(func) not in wrappers:
+                qualname = '{}.{}'.format(func.__module__, func.__name__)
+                wrappers[id(func)] = _instrument(qualname, func, max_samples)
+
+    # Every loaded module is searched, not just the package, so names bound
+    # by from images import * in scripts and other packages are replaced
+    for module in list(sys.modules.values()):
+        try:
+            items = list(vars(module).items())
+        except TypeError:
+            continue
+        for name, value in items:
+            if id(value) in wrappers and inspect.isfunction(value):
+                setattr(module, name, wrappers[id(value)])
+                _patched.append((module, name, value))
+
+
+def disable_profiling():
+    """Restores the original functions, keeping the recorded statistics"""
+    while _patched:
+        module, name, func = _patched.pop()
+        setattr(module, name, func)
+
+
+def reset_profiling():
+    """Clears the recorded statistics"""
+    with _lock:
+        _stats.clear()
+
+
+def profiling_stats():
+    """
+    Returns the recorded statistics.
+
+    Returns
+    -------
+    stats: dict
+        Maps 'module.function' to a dict with 'calls', 'total', 'mean' and
+        'p95' times in seconds and 'shapes', the three most common shapes
+        of the first array argument with their counts.
+    """
+    with _lock:
+        return {name: stats.summary() for name, stats in _stats.items()
+                if stats.calls > 0}
+
+
+def profiling_report(fmt='table'):
+    """
+    Formats the recorded statistics.
+
+    Parameters
+    ----------
+    fmt: 'table' for a text table sorted by total time or 'json'
+
+    Returns
+    -------
+    report: str
+    """
+    stats = profiling_stats()
+    if fmt == 'json':
+        return json.dumps(stats, indent=2)
+    if fmt != 'table':
+        raise ValueError("fmt must be 'table' or 'json'")
+    lines = ['{:<45} {:>8} {:>11} {:>10} {:>10}  {}'.format(
+        'function', 'calls', 'total (ms)', 'mean (ms)', 'p95 (ms)',
+        'shapes')]
+    for name, s in sorted(stats.items(), key=lambda item: -item[1]['total']):
+        shapes = ', '.join('{}x{}'.format(tuple(shape), count)
+                           for shape, count in s['shapes'])
+        lines.append('{:<45} {:>8} {:>11.3f} {:>10.3f} {:>10.3f}  {}'.format(
+            name, s['calls'], s['total'] * 1e3, s['mean'] * 1e3,
+            s['p95'] * 1e3, shapes))
+    return '\n'.join(lines)
@@ -1,10 +1,11 @@
 import cv2
-import numpy as np
+
+from images.basics import _check_out
 
 __all__ = ['gaussian_blur', 'median_blur']
 
 
-def gaussian_blur(img, kernel=(3, 3)):
+def gaussian_blur(img, kernel=(3, 3), out=None):
     """
     Blurs an image using a gaussian filter
 
@@ -18,17 +19,20 @@ def gaussian_blur(img, kernel=(3, 3)):
     kernel: tuple giving (width, height) for kernel
         Width and height should be positive and odd
 
+    out: optional preallocated output image
+        Same size and type as img
+
     Returns
     -------
     out: output image
         Same size and type as img
     """
-    print(np.shape(img))
-    out = cv2.GaussianBlur(img, kernel, 0)
+    _check_out(out, img.shape, img.dtype)
+    out = cv2.GaussianBlur(img, kernel, 0, dst=out)
     return out
 
 
-def median_blur(img, kernel=3):
+def median_blur(img, kernel=3, out=None):
     """
     Blurs an image using a median filter
 
@@ -42,11 +46,14 @@ def median_blur(img, kernel=3):
     kernel: tuple giving (width, height) for kernel
         Width and height should be positive and odd
 
+    out: optional preallocated output image
+        Same size and type as img
+
     Returns
     -------
     out: output image
         Same size and type as img
     """
-    print(kernel)
-    out = cv2.medianBlur(img, kernel)
+    _check_out(out, img.shape, img.dtype)
+    out = cv2.medianBlur(img, kernel, dst=out)
     return out
@@ -0,0 +1,189 @@
+import struct
+
+import numpy as np
+
+from images.colors import bgr_to_gray
+
+__all__ = [
+    'FrameStack',
+    'StackWriter',
+    'read_stack',
+    'write_stack'
+]
+
+_MAGIC = b'\x93NUMPY\x01\x00'
+_HEADER_SIZE = 128
+
+
+def _header(num_frames, frame_shape, dtype):
+    """
+    Builds a fixed size .npy header for a stack of frames.
+
+    The header is padded to _HEADER_SIZE bytes so it can be rewritten in
+    place once the final number of frames is known.
+    """
+    shape = (int(num_frames),) + tuple(int(s) for s in frame_shape)
+    info = {'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+            'fortran_order': False,
+            'shape': shape}
+    text = repr(info)
+    length = _HEADER_SIZE - len(_MAGIC) - 2
+    text = text.ljust(length - 1) + '\n'
+    assert len(text) == length, "Frame shape too large for stack header"
+    return _MAGIC + struct.pack('<H', length) + text.encode('latin1')
+
+
+class StackWriter:
+    """
+    Writes a sequence of same shaped frames to a single raw stack file.
+
+    The file is a standard .npy file so it can also be opened with
+    np.load(filename, mmap_mode='r').
+
+    Parameters
+    ----------
+    filename: name of the stack file
+        Conventionally ends in .npy
+
+    Notes
+    -----
+    The shape and dtype of the stack are taken from the first frame
+    written. The header is finalised when the writer is closed so always
+    use it as a context manager or call close().
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.num_frames = 0
+        self.frame_shape = None
+        self.dtype = None
+        self._file = open(filename, 'wb')
+        self._file.write(b'\0' * _HEADER_SIZE)
+
+    def write(self, frame):
+        frame = np.asarray(frame)
+        if self.frame_shape is None:
+            self.frame_shape = frame.shape
+            self.dtype = frame.dtype
+        elif frame.shape != self.frame_shape or frame.dtype != self.dtype:
+            raise ValueError(
+                'Frame has shape {} and dtype {}, stack expects {} and {}'
+                .format(frame.shape, frame.dtype, self.frame_shape,
+                        self.dtype))
+        np.ascontiguousarray(frame).tofile(self._file)
+        self.num_frames += 1
+
+    def close(self):
+        if self._file.closed:
+            return
+        if self.frame_shape is None:
+            self._file.close()
+            raise ValueError('No frames were written to the stack')
+        self._file.seek(0)
+        self._file.write(
+            _header(self.num_frames, self.frame_shape, self.dtype))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None and self.frame_shape is None:
+            # Let the original error propagate instead of the empty stack
+            self._file.close()
+        else:
+            self.close()
+
+
+class FrameStack:
+    """
+    Random access to a stack file without loading it into memory.
+
+    Indexing and slicing return views of the memory mapped file so only the
+    pages that are touched are read from disk.
+
+    Parameters
+    ----------
+    filename: stack file written by StackWriter or write_stack
+
+    mode: memory map mode
+        'r' for read only, 'r+' to modify frames in place
+
+    Notes
+    -----
+    Implements num_frames, grayscale and find_frame(n) so a FrameStack can
+    be passed to the multiframe ParamGui guis.
+    """
+
+    def __init__(self, filename, mode='r'):
+        self.filename = filename
+        self.frames = np.load(filename, mmap_mode=mode)
+        self.num_frames = len(self.frames)
+        self.grayscale = False
+
+    @property
+    def shape(self):
+        return self.frames.shape
+
+    @property
+    def dtype(self):
+        return self.frames.dtype
+
+    @property
+    def frame_shape(self):
+        return self.frames.shape[1:]
+
+    def __len__(self):
+        return self.num_frames
+
+    def __getitem__(self, item):
+        return self.frames[item]
+
+    def __iter__(self):
+        for n in range(self.num_frames):
+            yield self.frames[n]
+
+    def find_frame(self, n):
+        frame = self.frames[n]
+        if self.grayscale and frame.ndim == 3:
+            frame = bgr_to_gray(frame)
+        return frame
+
+
+def read_stack(filename, mode='r'):
+    """
+    Opens a stack file for random access.
+
+    Parameters
+    ----------
+    filename: stack file written by StackWriter or write_stack
+
+    mode: memory map mode, 'r' or 'r+'
+
+    Returns
+    -------
+    stack: FrameStack instance
+        stack[i] and stack[a:b:step] are views into the file
+    """
+    return FrameStack(filename, mode)
+
+
+def write_stack(frames, filename):
+    """
+    Writes an iterable of same shaped frames to a single stack file.
+
+    Parameters
+    ----------
+    frames: iterable of images
+        For example the generator returned by read_imgs
+
+    filename: name of the stack file
+
+    Returns
+    -------
+    stack: FrameStack instance opened on the new file
+    """
+    with StackWriter(filename) as writer:
+        for frame in frames:
+            writer.write(frame)
+    return FrameStack(filename)
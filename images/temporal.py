@@ -0,0 +1,455 @@
+import numpy as np
+
+__all__ = [
+    'RunningMean',
+    'RunningVariance',
+    'RunningMinMax',
+    'RunningMedian',
+    'temporal_mean',
+    'temporal_std',
+    'temporal_min_max',
+    'temporal_median'
+]
+
+
+class _Accumulator:
+    """
+    Base class for per pixel statistics over a sequence of frames.
+
+    Frames are added one at a time with update, a block of frames with
+    update_chunk or from any iterable with extend. Accumulators of the same
+    type fed with different frames can be combined with merge, for example
+    to join the partial results of several workers.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def update(self, frame):
+        raise NotImplementedError
+
+    def update_chunk(self, frames):
+        """frames is an array with the frame number along the first axis"""
+        for frame in frames:
+            self.update(frame)
+        return self
+
+    def merge(self, other):
+        raise NotImplementedError
+
+    def extend(self, frames):
+        for frame in frames:
+            self.update(frame)
+        return self
+
+    def _check_shape(self, shape):
+        if self.count == 0:
+            return
+        if shape != self.shape:
+            raise ValueError('Frame shape {} does not match {}'.format(
+                shape, self.shape))
+
+
+class RunningMean(_Accumulator):
+    """
+    Per pixel mean of a sequence of frames.
+
+    Keeps a single float64 sum the size of one frame.
+    """
+
+    def __init__(self):
+        _Accumulator.__init__(self)
+        self.shape = None
+        self.total = None
+
+    def update(self, frame):
+        frame = np.asarray(frame)
+        self._check_shape(frame.shape)
+        if self.count == 0:
+            self.shape = frame.shape
+            self.total = np.zeros(frame.shape, np.float64)
+        np.add(self.total, frame, out=self.total)
+        self.count += 1
+        return self
+
+    def update_chunk(self, frames):
+        frames = np.asarray(frames)
+        if len(frames) == 0:
+            return self
+        self.update(frames[0])
+        if len(frames) > 1:
+            self.total += np.sum(frames[1:], axis=0, dtype=np.float64)
+            self.count += len(frames) - 1
+        return self
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.shape = other.shape
+            self.total = other.total.copy()
+        else:
+            self._check_shape(other.shape)
+            self.total += other.total
+        self.count += other.count
+        return self
+
+    @property
+    def mean(self):
+        return self.total / self.count
+
+
+class RunningVariance(_Accumulator):
+    """
+    Per pixel mean and variance of a sequence of frames.
+
+    Uses Welford's algorithm for updates and Chan's parallel formula for
+    merging chunks so the result is numerically stable for long sequences.
+    """
+
+    def __init__(self):
+        _Accumulator.__init__(self)
+        self.shape = None
+        self.mean = None
+        self.m2 = None
+
+    def update(self, frame):
+        frame = np.asarray(frame)
+        self._check_shape(frame.shape)
+        if self.count == 0:
+            self.shape = frame.shape
+            self.mean = np.zeros(frame.shape, np.float64)
+            self.m2 = np.zeros(frame.shape, np.float64)
+        self.count += 1
+        delta = frame - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (frame - self.mean)
+        return self
+
+    def update_chunk(self, frames):
+        frames = np.asarray(frames, dtype=np.float64)
+        if len(frames) == 0:
+            return self
+        chunk = RunningVariance()
+        chunk.shape = frames.shape[1:]
+        chunk.count = len(frames)
+        chunk.mean = np.mean(frames, axis=0)
+        chunk.m2 = np.sum((frames - chunk.mean) ** 2, axis=0)
+        return self.merge(chunk)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.shape = other.shape
+            self.count = other.count
+            self.mean = other.mean.copy()
+            self.m2 = other.m2.copy()
+            return self
+        self._check_shape(other.shape)
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * (other.count / count)
+        self.m2 += other.m2 + delta ** 2 * (self.count * other.count / count)
+        self.count = count
+        return self
+
+    def variance(self, ddof=0):
+        return self.m2 / (self.count - ddof)
+
+    def std(self, ddof=0):
+        return np.sqrt(self.variance(ddof))
+
+
+class RunningMinMax(_Accumulator):
+    """Per pixel minimum and maximum of a sequence of frames."""
+
+    def __init__(self):
+        _Accumulator.__init__(self)
+        self.shape = None
+        self.min = None
+        self.max = None
+
+    def update(self, frame):
+        frame = np.asarray(frame)
+        self._check_shape(frame.shape)
+        if self.count == 0:
+            self.shape = frame.shape
+            self.min = frame.copy()
+            self.max = frame.copy()
+        else:
+            np.minimum(self.min, frame, out=self.min)
+            np.maximum(self.max, frame, out=self.max)
+        self.count += 1
+        return self
+
+    def update_chunk(self, frames):
+        frames = np.asarray(frames)
+        if len(frames) == 0:
+            return self
+        chunk = RunningMinMax()
+        chunk.shape = frames.shape[1:]
+        chunk.count = len(frames)
+        chunk.min = np.min(frames, axis=0)
+        chunk.max = np.max(frames, axis=0)
+        return self.merge(chunk)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.shape = other.shape
+            self.min = other.min.copy()
+            self.max = other.max.copy()
+        else:
+            self._check_shape(other.shape)
+            np.minimum(self.min, other.min, out=self.min)
+            np.maximum(self.max, other.max, out=self.max)
+        self.count += other.count
+        return self
+
+
+class RunningMedian(_Accumulator):
+    """
+    Approximate per pixel median of a sequence of frames.
+
+    Each pixel keeps a histogram of its values with a fixed number of bins.
+    The median is found by linear interpolation inside the bin containing
+    the middle value, so the error is at most one bin width.
+
+    Parameters
+    ----------
+    bins: number of histogram bins per pixel
+        Memory used is 4 * bins bytes per pixel
+
+    value_range: (low, high) range of pixel values
+        Defaults to (0, 256) which suits uint8 images. Values outside the
+        range are counted in the first or last bin.
+
+    Notes
+    -----
+    Histograms from different workers are merged exactly so the result
+    does not depend on how the frames were split.
+
+    A median over a sliding window of frames is best kept with slide,
+    which updates the median incrementally.
+    """
+
+    def __init__(self, bins=16, value_range=(0, 256)):
+        _Accumulator.__init__(self)
+        self.bins = bins
+        self.value_range = value_range
+        self.shape = None
+        self.counts = None
+        self._offsets = None
+        self._lookup = None
+        # Middle bin, values below it, values in it and median of each
+        # pixel, kept up to date by slide
+        self._middle = None
+
+    def _bin_index(self, frame):
+        """Bin of each pixel of a frame as a flat array"""
+        if frame.dtype == np.uint8:
+            # Bin every possible value once and look the frame up
+            if self._lookup is None:
+                self._lookup = self._bins_of(np.arange(256))
+                if self.bins <= 256:
+                    self._lookup = self._lookup.astype(np.uint8)
+            return self._lookup[frame.ravel()]
+        return self._bins_of(frame.ravel())
+
+    def _flat_index(self, bins):
+        """Index into the flattened counts of each pixel's bin"""
+        index = bins.astype(np.intp)
+        index *= self.counts.shape[1]
+        index += self._offsets
+        return index
+
+    def _bins_of(self, values):
+        low, high = self.value_range
+        # Subtract in float so values below low in unsigned frames do not
+        # wrap around into the last bin
+        index = np.subtract(values, low, dtype=np.float64)
+        index *= self.bins / (high - low)
+        return np.clip(index, 0, self.bins - 1).astype(np.intp)
+
+    def update(self, frame):
+        frame = np.asarray(frame)
+        self._check_shape(frame.shape)
+        if self.count == 0:
+            self.shape = frame.shape
+            self.counts = np.zeros((self.bins, frame.size), np.uint32)
+            self._offsets = np.arange(frame.size)
+        index = self._flat_index(self._bin_index(frame))
+        self.counts.reshape(-1)[index] += 1
+        self.count += 1
+        self._middle = None
+        return self
+
+    def remove(self, frame):
+        """
+        Removes a frame that was added earlier.
+
+        Used for a median over a sliding window of frames, the frame must
+        have been added with update or the counts become wrong.
+        """
+        frame = np.asarray(frame)
+        if self.count == 0:
+            raise ValueError('No frames have been added')
+        self._check_shape(frame.shape)
+        index = self._flat_index(self._bin_index(frame))
+        self.counts.reshape(-1)[index] -= 1
+        self.count -= 1
+        self._middle = None
+        return self
+
+    def slide(self, frame, old=None):
+        """
+        Adds a frame and removes an older one, keeping the median current.
+
+        The bin holding each pixel's middle value is stepped up or down as
+        values come and go instead of being searched for again, and when
+        old is given only pixels whose bin changed are touched. A median
+        over a sliding window of a mostly static scene then costs little
+        more than binning the two frames.
+
+        Parameters
+        ----------
+        frame: frame to add
+
+        old: optional frame to remove, must have been added earlier or the
+            counts become wrong
+        """
+        frame = np.asarray(frame)
+        if self._middle is None:
+            self.update(frame)
+            if old is not None:
+                self.remove(old)
+            middle, below = self._middle_bins()
+            in_bin = self.counts[middle, self._offsets]
+            self._middle = (middle, below, in_bin,
+                            self._interpolate(middle, below, in_bin))
+            return self
+
+        self._check_shape(frame.shape)
+        added = self._bin_index(frame)
+        if old is None:
+            # Every pixel gains a value so every pixel is updated
+            pixels = self._offsets
+            select = slice(None)
+            removed = None
+            self.count += 1
+        else:
+            old = np.asarray(old)
+            self._check_shape(old.shape)
+            removed = self._bin_index(old)
+            pixels = np.flatnonzero(added != removed)
+            select = pixels
+            added, removed = added[pixels], removed[pixels]
+
+        counts, count = self.counts, self.count
+        all_middle, all_below, all_in_bin, values = self._middle
+        middle = all_middle[select]
+        below = all_below[select]
+        in_bin = all_in_bin[select]
+        counts[added, pixels] += 1
+        below += added < middle
+        in_bin += added == middle
+        if removed is not None:
+            counts[removed, pixels] -= 1
+            below -= removed < middle
+            in_bin -= removed == middle
+
+        # The middle bin is the lowest bin with more than half the values
+        # in it or below it
+        moving = np.flatnonzero(2 * below >= count)
+        while len(moving):
+            middle[moving] -= 1
+            in_bin[moving] = counts[middle[moving], pixels[moving]]
+            below[moving] -= in_bin[moving]
+            moving = moving[2 * below[moving] >= count]
+        moving = np.flatnonzero(2 * (below + in_bin) < count)
+        while len(moving):
+            below[moving] += in_bin[moving]
+            middle[moving] += 1
+            in_bin[moving] = counts[middle[moving], pixels[moving]]
+            moving = moving[2 * (below[moving] + in_bin[moving]) < count]
+
+        all_middle[select] = middle
+        all_below[select] = below
+        all_in_bin[select] = in_bin
+        values[select] = self._interpolate(middle, below, in_bin)
+        return self
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        if (other.bins, other.value_range) != (self.bins, self.value_range):
+            raise ValueError('Cannot merge medians with different bins')
+        if self.count == 0:
+            self.shape = other.shape
+            self.counts = other.counts.copy()
+            self._offsets = np.arange(self.counts.shape[1])
+        else:
+            self._check_shape(other.shape)
+            self.counts += other.counts
+        self.count += other.count
+        self._middle = None
+        return self
+
+    def _middle_bins(self):
+        """
+        Bin containing the middle value of each pixel and the number of
+        values in the bins below it
+        """
+        # Walk through the bins keeping running totals so only a few frame
+        # sized arrays are needed rather than a cumsum of every bin. A bin
+        # is wholly below the middle value if cumulative < count / 2.
+        below_limit = np.uint32((self.count + 1) // 2)
+        size = self.counts.shape[1]
+        cumulative = np.zeros(size, np.uint32)
+        before = np.zeros(size, np.uint32)
+        index = np.zeros(size, np.intp)
+        below = np.empty(size, bool)
+        for counts in self.counts[:-1]:
+            cumulative += counts
+            np.less(cumulative, below_limit, out=below)
+            index += below
+            np.add(before, counts, out=before, where=below)
+        return index, before
+
+    def _interpolate(self, index, before, in_bin=None):
+        """Flat median from the middle bins found by _middle_bins"""
+        low, high = self.value_range
+        width = (high - low) / self.bins
+        if in_bin is None:
+            in_bin = self.counts[index, self._offsets]
+        fraction = (self.count / 2 - before) / np.maximum(in_bin, 1)
+        return low + (index + fraction) * width
+
+    @property
+    def median(self):
+        if self._middle is not None:
+            return self._middle[3].reshape(self.shape)
+        return self._interpolate(*self._middle_bins()).reshape(self.shape)
+
+
+def temporal_mean(frames):
+    """Per pixel mean of an iterable of frames as a float64 array"""
+    return RunningMean().extend(frames).mean
+
+
+def temporal_std(frames, ddof=0):
+    """Per pixel standard deviation of an iterable of frames"""
+    return RunningVariance().extend(frames).std(ddof)
+
+
+def temporal_min_max(frames):
+    """Per pixel minimum and maximum of an iterable of frames"""
+    acc = RunningMinMax().extend(frames)
+    return acc.min, acc.max
+
+
+def temporal_median(frames, bins=16, value_range=(0, 256)):
+    """Approximate per pixel median of an iterable of frames"""
+    return RunningMedian(bins, value_range).extend(frames).median
@@ -1,6 +1,8 @@
 import cv2
 import numpy as np
 from __init__ import *
+from images.basics import _check_out
+from images.histograms import otsu_threshold
 
 __all__ = [
     'threshold',
@@ -11,18 +13,28 @@ __all__ = [
 ]
 
 
-def threshold(im, value=None, mode=cv2.THRESH_BINARY):
+def threshold(im, value=None, mode=cv2.THRESH_BINARY, out=None, hist=None):
     """
     Thresholds an image
 
     Pixels below thresh set to black, pixels above set to white
+
+    If value is None Otsu's method chooses it. If hist is given the value
+    is taken from that histogram, for example one accumulated over many
+    frames, instead of from im.
+
+    If given, out is a preallocated output the same size and type as im
     """
-    if value is None:
+    if value is None and hist is not None:
+        value = otsu_threshold(hist)
+    elif value is None:
         mode = mode + cv2.THRESH_OTSU
-    return cv2.threshold(im, value, 255, mode)[1]
+    _check_out(out, im.shape, im.dtype)
+    return cv2.threshold(im, value, 255, mode, dst=out)[1]
 
 
-def adaptive_threshold(im, block_size, constant, mode=cv2.THRESH_BINARY):
+def adaptive_threshold(im, block_size, constant, mode=cv2.THRESH_BINARY,
+                       out=None):
     """
     Performs an adaptive threshold on an image
 
@@ -41,14 +53,19 @@ def adaptive_threshold(im, block_size, constant, mode=cv2.THRESH_BINARY):
     block_size: the size of the neighbourhood area
 
     constant: subtracted from the weighted sum
+
+    out: optional preallocated output
+        Same size and type as im
     """
+    _check_out(out, im.shape, im.dtype)
     out = cv2.adaptiveThreshold(
         im,
         255,
         cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
         mode,
         block_size,
-        constant
+        constant,
+        dst=out
     )
     return out
 
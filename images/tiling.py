@@ -0,0 +1,138 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+__all__ = [
+    'tiled',
+    'tile_halo'
+]
+
+
+def _radius(kernel):
+    # Arrays are structuring elements, anything else is a size
+    if isinstance(kernel, np.ndarray):
+        return max(np.shape(kernel)) // 2
+    if np.size(kernel) == 1:
+        return int(kernel) // 2
+    return max(kernel) // 2
+
+
+# Pixels each function needs beyond a tile to reproduce the untiled result
+_HALOS = {
+    'gaussian_blur': lambda kernel=(3, 3), **kw: _radius(kernel),
+    'median_blur': lambda kernel=3, **kw: _radius(kernel),
+    'adaptive_threshold': lambda block_size, **kw: block_size // 2,
+    'dilate': lambda kernel=(3, 3), iterations=1, **kw:
+        _radius(kernel) * iterations,
+    'erode': lambda kernel=(3, 3), iterations=1, **kw:
+        _radius(kernel) * iterations,
+    'opening': lambda kernel=(3, 3), iterations=1, **kw:
+        2 * _radius(kernel) * iterations,
+    'closing': lambda kernel=(3, 3), iterations=1, **kw:
+        2 * _radius(kernel) * iterations,
+    'gradient': lambda kernel=(3, 3), iterations=1, **kw:
+        _radius(kernel) * iterations,
+    'top_hat': lambda kernel=(3, 3), iterations=1, **kw:
+        2 * _radius(kernel) * iterations,
+    'black_hat': lambda kernel=(3, 3), iterations=1, **kw:
+        2 * _radius(kernel) * iterations,
+}
+
+
+def tile_halo(func, **kwargs):
+    """
+    Returns the halo needed to tile func with the given arguments.
+
+    Parameters
+    ----------
+    func: gaussian_blur, median_blur, adaptive_threshold, dilate, erode,
+        opening or closing
+
+    kwargs: the keyword arguments that will be passed to func
+
+    Returns
+    -------
+    halo: int
+        Number of pixels of overlap each tile needs on every side
+    """
+    name = getattr(func, '__name__', None)
+    if name not in _HALOS:
+        raise ValueError(
+            'Halo for {} is not known, pass halo to tiled'.format(name))
+    return _HALOS[name](**kwargs)
+
+
+def tiled(func, img, tile_size=1024, halo=None, workers=4, out=None,
+          **kwargs):
+    """
+    Applies a neighbourhood operation to a large image tile by tile.
+
+    Each tile is extended by a halo of surrounding pixels, processed, and
+    only its centre is written to the output. With a large enough halo the
+    result is identical to func(img, **kwargs).
+
+    Parameters
+    ----------
+    func: function called as func(tile, **kwargs)
+        Must return an image with the same height and width as the tile
+
+    img: input image
+        Can be a np.memmap, only the pixels of each tile are read
+
+    tile_size: int or (height, width) of the tiles without their halo
+
+    halo: pixels of overlap on each side of a tile
+        Defaults to tile_halo(func, **kwargs) for the functions it knows.
+        distance_transform needs a halo larger than the largest distance
+        in the image.
+
+    workers: number of threads processing tiles
+
+    out: optional output array or filename
+        A filename creates a .npy file opened as a memory map, so the
+        output never has to fit in memory.
+
+    kwargs: extra keyword arguments for func
+
+    Returns
+    -------
+    out: output image
+        Same height and width as img
+    """
+    if halo is None:
+        halo = tile_halo(func, **kwargs)
+    tile_h, tile_w = (tile_size, tile_size) if np.size(tile_size) == 1 \
+        else tile_size
+    height, width = img.shape[:2]
+    tiles = [(y, min(y + tile_h, height), x, min(x + tile_w, width))
+             for y in range(0, height, tile_h)
+             for x in range(0, width, tile_w)]
+
+    def process(tile):
+        y0, y1, x0, x1 = tile
+        ys, xs = max(y0 - halo, 0), max(x0 - halo, 0)
+        ye, xe = min(y1 + halo, height), min(x1 + halo, width)
+        result = func(np.ascontiguousarray(img[ys:ye, xs:xe]), **kwargs)
+        return result[y0 - ys:y1 - ys, x0 - xs:x1 - xs]
+
+    def store(tile, result):
+        y0, y1, x0, x1 = tile
+        out[y0:y1, x0:x1] = result
+
+    first = process(tiles[0])
+    shape = (height, width) + first.shape[2:]
+    if out is None:
+        out = np.empty(shape, first.dtype)
+    elif isinstance(out, str):
+        out = np.lib.format.open_memmap(out, mode='w+', dtype=first.dtype,
+                                        shape=shape)
+    elif out.shape != shape:
+        raise ValueError('out has shape {}, expected {}'.format(
+            out.shape, shape))
+    store(tiles[0], first)
+
+    # Tiles do not overlap in out so each thread writes its own result
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda tile: store(tile, process(tile)),
+                          tiles[1:]))
+    return out
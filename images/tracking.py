@@ -0,0 +1,219 @@
+import numpy as np
+
+__all__ = [
+    'TRACK_DTYPE',
+    'Tracker',
+    'link',
+    'trajectory'
+]
+
+# One row per detection in the trajectory table
+TRACK_DTYPE = np.dtype([('frame', np.int32), ('particle', np.int32),
+                        ('x', np.float32), ('y', np.float32),
+                        ('r', np.float32)])
+
+
+def _as_detections(detections):
+    """Returns detections as an (N, 3) float array, r is nan if missing"""
+    # find_circles returns np.squeeze(None), a 0-d object array, when a
+    # frame has no circles
+    detections = np.asarray(detections)
+    if detections.ndim == 0 or detections.dtype == object \
+            or detections.size == 0:
+        return np.zeros((0, 3))
+    detections = detections.astype(np.float64)
+    detections = detections.reshape(-1, detections.shape[-1])
+    if detections.shape[1] == 2:
+        detections = np.column_stack(
+            (detections, np.full(len(detections), np.nan)))
+    return detections[:, :3]
+
+
+class Tracker:
+    """
+    Links detections in consecutive frames into trajectories.
+
+    Each frame's detections are put in a cKDTree and the last known
+    position of every active particle is matched to its nearest detections
+    within max_displacement. Closest pairs are linked first, so the cost
+    per frame is O(N log N) rather than O(N^2).
+
+    Parameters
+    ----------
+    max_displacement: largest distance a particle can move between the
+        frames it is detected in
+
+    memory: number of consecutive frames a particle can be missed and
+        still be linked when it reappears, 0 disables gap closing
+
+    neighbours: number of nearest detections considered for each particle
+        More only matters when particles are closer than max_displacement
+
+    capacity: initial number of rows of the trajectory table
+        The table doubles in size when it is full
+
+    Notes
+    -----
+    Only particles seen in the last memory frames are kept for matching, so
+    the working set stays the size of one frame however long the video.
+    The trajectory table is the only thing that grows.
+
+    Examples
+    --------
+    tracker = Tracker(max_displacement=10, memory=2)
+    for frame in read_imgs('frames/*.png', flag=0):
+        tracker.update(find_circles(frame, 20, 200, 10, 5, 15))
+    table = tracker.table
+    """
+
+    def __init__(self, max_displacement, memory=3, neighbours=4,
+                 capacity=4096):
+        self.max_displacement = max_displacement
+        self.memory = memory
+        self.neighbours = neighbours
+        self.frame = -1
+        self.num_particles = 0
+        self._table = np.zeros(capacity, TRACK_DTYPE)
+        self._rows = 0
+        self._ids = np.zeros(0, np.int64)
+        self._positions = np.zeros((0, 2))
+        self._last_seen = np.zeros(0, np.int64)
+
+    @property
+    def table(self):
+        """
+        Trajectory table of every detection so far.
+
+        Structured array with fields frame, particle, x, y and r ordered by
+        frame. This is a view, copy it if the tracker is updated again.
+        """
+        return self._table[:self._rows]
+
+    def _match(self, positions):
+        """Returns indices of matched active particles and detections"""
+        from scipy.spatial import cKDTree
+
+        if len(self._ids) == 0 or len(positions) == 0:
+            return np.zeros(0, np.intp), np.zeros(0, np.intp)
+        k = min(self.neighbours, len(positions))
+        distances, neighbours = cKDTree(positions).query(
+            self._positions, k=k, distance_upper_bound=self.max_displacement)
+        distances = distances.reshape(len(self._ids), k)
+        neighbours = neighbours.reshape(len(self._ids), k)
+
+        # Candidate pairs within range, closest first
+        particle, column = np.nonzero(np.isfinite(distances))
+        detection = neighbours[particle, column]
+        order = np.argsort(distances[particle, column], kind='stable')
+        particle, detection = particle[order], detection[order]
+
+        # The first pair for each particle and for each detection are the
+        # closest ones, pairs that are both are linked without a loop
+        first_particle = np.zeros(len(particle), bool)
+        first_particle[np.unique(particle, return_index=True)[1]] = True
+        first_detection = np.zeros(len(detection), bool)
+        first_detection[np.unique(detection, return_index=True)[1]] = True
+        mutual = first_particle & first_detection
+
+        particle_used = np.zeros(len(self._ids), bool)
+        detection_used = np.zeros(len(positions), bool)
+        particle_used[particle[mutual]] = True
+        detection_used[detection[mutual]] = True
+        matched_particles = list(particle[mutual])
+        matched_detections = list(detection[mutual])
+        for p, d in zip(particle[~mutual], detection[~mutual]):
+            if not particle_used[p] and not detection_used[d]:
+                particle_used[p] = detection_used[d] = True
+                matched_particles.append(p)
+                matched_detections.append(d)
+        return (np.array(matched_particles, np.intp),
+                np.array(matched_detections, np.intp))
+
+    def _append(self, frame, ids, detections):
+        end = self._rows + len(ids)
+        if end > len(self._table):
+            grown = np.zeros(max(end, 2 * len(self._table)), TRACK_DTYPE)
+            grown[:self._rows] = self.table
+            self._table = grown
+        rows = self._table[self._rows:end]
+        rows['frame'] = frame
+        rows['particle'] = ids
+        rows['x'], rows['y'], rows['r'] = detections.T
+        self._rows = end
+
+    def update(self, detections, frame=None):
+        """
+        Links the detections of the next frame.
+
+        Parameters
+        ----------
+        detections: array of (x, y, r) or (x, y) for each detection
+            As returned by find_circles
+
+        frame: frame number, defaults to one more than the last frame
+
+        Returns
+        -------
+        ids: particle number of each detection
+        """
+        frame = self.frame + 1 if frame is None else int(frame)
+        if frame <= self.frame:
+            raise ValueError('Frame {} is not after frame {}'.format(
+                frame, self.frame))
+        self.frame = frame
+        detections = _as_detections(detections)
+        positions = detections[:, :2]
+
+        matched_particles, matched_detections = self._match(positions)
+        ids = np.empty(len(detections), np.int64)
+        ids[matched_detections] = self._ids[matched_particles]
+        new = np.ones(len(detections), bool)
+        new[matched_detections] = False
+        num_new = np.count_nonzero(new)
+        ids[new] = np.arange(self.num_particles, self.num_particles + num_new)
+        self.num_particles += num_new
+
+        # Particles not seen for more than memory frames are forgotten
+        self._positions[matched_particles] = positions[matched_detections]
+        self._last_seen[matched_particles] = frame
+        keep = frame - self._last_seen <= self.memory
+        self._ids = np.concatenate((self._ids[keep], ids[new]))
+        self._positions = np.concatenate(
+            (self._positions[keep], positions[new]))
+        self._last_seen = np.concatenate(
+            (self._last_seen[keep], np.full(num_new, frame)))
+
+        self._append(frame, ids, detections)
+        return ids
+
+
+def link(detections, max_displacement, memory=3, neighbours=4):
+    """
+    Links the detections of a sequence of frames into trajectories.
+
+    Parameters
+    ----------
+    detections: iterable of detection arrays, one per frame
+        For example the results of find_circles for each frame
+
+    max_displacement, memory, neighbours: see Tracker
+
+    Returns
+    -------
+    table: structured array with fields frame, particle, x, y and r
+    """
+    tracker = Tracker(max_displacement, memory, neighbours)
+    for frame_detections in detections:
+        tracker.update(frame_detections)
+    return tracker.table.copy()
+
+
+def trajectory(table, particle):
+    """
+    Returns the rows of one particle from a trajectory table.
+
+    Returns
+    -------
+    rows: structured array ordered by frame
+    """
+    return table[table['particle'] == particle]
@@ -0,0 +1,152 @@
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from images.colors import bgr_to_gray
+
+__all__ = [
+    'VideoReader',
+]
+
+
+class VideoReader:
+    """
+    Random access to the frames of a video with a cache of decoded frames.
+
+    Parameters
+    ----------
+    filename: filepath of the video
+
+    cache_size: maximum memory used by cached frames in MB
+
+    max_skip: largest jump ahead that is decoded sequentially
+        Requests up to max_skip frames beyond the current position are
+        reached by grabbing frames rather than seeking, which is much
+        faster than a seek for most codecs.
+
+    build_index: scan the video once to count frames and record timestamps
+        CAP_PROP_FRAME_COUNT is only an estimate for some containers.
+
+    Notes
+    -----
+    Implements num_frames, grayscale and find_frame(n) so a VideoReader can
+    be passed to the multiframe ParamGui guis.
+
+    Frames returned are read only as they are shared with the cache.
+    Copy them before drawing on them.
+    """
+
+    def __init__(self, filename, cache_size=512, max_skip=50,
+                 build_index=False):
+        self.filename = filename
+        self.cap = cv2.VideoCapture(filename)
+        if not self.cap.isOpened():
+            raise IOError('Could not open video {}'.format(filename))
+        self.num_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.max_skip = max_skip
+        self.cache_limit = int(cache_size * 1024 ** 2)
+        self.timestamps = None
+        self._grayscale = False
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._position = 0
+        if build_index:
+            self._build_index()
+
+    @property
+    def grayscale(self):
+        return self._grayscale
+
+    @grayscale.setter
+    def grayscale(self, value):
+        if value != self._grayscale:
+            self.clear_cache()
+        self._grayscale = value
+
+    def _build_index(self):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        timestamps = []
+        while self.cap.grab():
+            timestamps.append(self.cap.get(cv2.CAP_PROP_POS_MSEC))
+        self.timestamps = np.array(timestamps)
+        self.num_frames = len(timestamps)
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self._position = 0
+
+    def find_frame(self, n):
+        """
+        Returns frame n of the video.
+
+        Parameters
+        ----------
+        n: frame number
+            Negative values count back from the end of the video
+
+        Returns
+        -------
+        frame: decoded frame
+            Grayscale if the grayscale attribute is set, otherwise BGR
+        """
+        if n < 0:
+            n += self.num_frames
+        if not 0 <= n < self.num_frames:
+            raise IndexError('Frame {} out of range'.format(n))
+        if n in self._cache:
+            self._cache.move_to_end(n)
+            return self._cache[n]
+        frame = self._decode(n)
+        if self._grayscale:
+            frame = bgr_to_gray(frame)
+        frame.flags.writeable = False
+        self._add_to_cache(n, frame)
+        return frame
+
+    def _decode(self, n):
+        if n < self._position or n - self._position > self.max_skip:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, n)
+            self._position = n
+        while self._position < n:
+            self.cap.grab()
+            self._position += 1
+        ret, frame = self.cap.read()
+        if not ret:
+            raise IndexError('Could not decode frame {}'.format(n))
+        self._position += 1
+        return frame
+
+    def _add_to_cache(self, n, frame):
+        if frame.nbytes > self.cache_limit:
+            return
+        self._cache[n] = frame
+        self._cache_bytes += frame.nbytes
+        while self._cache_bytes > self.cache_limit:
+            _, old = self._cache.popitem(last=False)
+            self._cache_bytes -= old.nbytes
+
+    def clear_cache(self):
+        self._cache.clear()
+        self._cache_bytes = 0
+
+    def close(self):
+        self.clear_cache()
+        self.cap.release()
+
+    def __len__(self):
+        return self.num_frames
+
+    def __getitem__(self, n):
+        return self.find_frame(n)
+
+    def __iter__(self):
+        for n in range(self.num_frames):
+            yield self.find_frame(n)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
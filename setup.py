@@ -9,7 +9,7 @@ setuptools.setup(
     description='Package for openCV image analysis',
     package_dir={'': 'images'},
     packages=setuptools.find_packages(where='images'),
-    python_requires='>3.5',
+    python_requires='>=3.7',
     install_requires=[
         'opencv-python',
         'numpy',
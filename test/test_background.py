@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+from images.background import BackgroundModel
+from images.temporal import RunningMedian
+
+
+def scene(num_frames=30, shape=(40, 50), seed=0):
+    """Noisy static background with a bright square moving across it"""
+    rng = np.random.default_rng(seed)
+    base = rng.integers(40, 200, shape)
+    frames = []
+    for i in range(num_frames):
+        frame = np.clip(base + rng.integers(-2, 3, shape), 0, 255)
+        frame = frame.astype(np.uint8)
+        frame[10:20, i:i + 10] = 255
+        frames.append(frame)
+    return base, frames
+
+
+def with_object(frame):
+    """Copy of a frame with a bright square where the scene has none"""
+    frame = frame.copy()
+    frame[28:36, 5:15] = 255
+    return frame
+
+
+@pytest.mark.parametrize('mode', ['mean', 'exponential', 'median'])
+def test_modes_recover_background(mode):
+    base, frames = scene()
+    model = BackgroundModel(mode, alpha=0.1, window=9, bins=64)
+    for frame in frames:
+        model.update(frame)
+    background = model.background
+    assert background.dtype == np.uint8
+    assert background.shape == base.shape
+    # The moving square never covers the bottom half
+    error = np.abs(background[25:].astype(int) - base[25:])
+    assert error.max() <= 4
+
+
+def test_median_window_matches_running_median():
+    _, frames = scene(num_frames=20)
+    model = BackgroundModel('median', window=7, bins=16)
+    for n, frame in enumerate(frames, 1):
+        model.update(frame)
+        expected = RunningMedian(16).extend(frames[max(n - 7, 0):n]).median
+        np.testing.assert_array_equal(model.background,
+                                      np.rint(expected).astype(np.uint8))
+
+
+def test_foreground_mask_and_first_apply():
+    _, frames = scene()
+    model = BackgroundModel('median', window=9)
+    first = model.apply(frames[0], value=30)
+    assert first.dtype == np.uint8
+    assert not first.any()
+    for frame in frames[1:]:
+        model.apply(frame, value=30)
+    mask = model.apply(with_object(frames[-1]), value=30)
+    assert mask.dtype == np.uint8
+    assert set(np.unique(mask)) <= {0, 255}
+    assert mask[28:36, 5:15].all()
+    assert np.count_nonzero(mask[25:]) == 80
+
+
+def test_colour_frames():
+    _, frames = scene()
+    colour = [np.dstack((f, f // 2, 255 - f)) for f in frames]
+    for mode in ('mean', 'exponential', 'median'):
+        model = BackgroundModel(mode, window=9)
+        for frame in colour:
+            model.update(frame)
+        assert model.background.shape == colour[0].shape
+        mask = model.foreground(with_object(colour[-1]), value=30)
+        assert mask.shape == colour[0].shape[:2]
+        assert mask[28:36, 5:15].all()
+        assert np.count_nonzero(mask[25:]) == 80
+
+
+def test_empty_model_raises():
+    with pytest.raises(ValueError):
+        BackgroundModel('median').background
+    with pytest.raises(ValueError):
+        BackgroundModel('mode')
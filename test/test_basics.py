@@ -0,0 +1,126 @@
+import time
+
+import numpy as np
+import cv2
+import pytest
+from images.basics import Displayer, read_img, read_imgs, ImageWriter
+from images.cropping import BBox
+
+
+def write_frames(directory, n=12):
+    for i in range(n):
+        cv2.imwrite(str(directory / 'frame{:03d}.png'.format(i)),
+                    np.full((8, 8, 3), i, dtype=np.uint8))
+
+
+def test_read_imgs_keeps_order(tmp_path):
+    write_frames(tmp_path)
+    values = [im[0, 0, 0] for im in read_imgs(str(tmp_path), queue_depth=3)]
+    assert values == list(range(12))
+
+
+def test_read_imgs_flag_and_glob(tmp_path):
+    write_frames(tmp_path)
+    ims = list(read_imgs(str(tmp_path / '*.png'), flag=0, workers=2))
+    assert len(ims) == 12
+    assert ims[0].shape == (8, 8)
+
+
+def test_image_writer_writes_all_frames(tmp_path):
+    im = np.zeros((8, 8, 3), dtype=np.uint8)
+    with ImageWriter(queue_depth=2,
+                     params={'.png': [cv2.IMWRITE_PNG_COMPRESSION, 1]}) as w:
+        for i in range(6):
+            im[:] = i
+            w.write(im, str(tmp_path / 'out{}.png'.format(i)))
+    values = [frame[0, 0, 0] for frame in read_imgs(str(tmp_path))]
+    assert values == list(range(6))
+
+
+def test_image_writer_reports_failures(tmp_path):
+    writer = ImageWriter()
+    writer.write(np.zeros((4, 4), np.uint8), str(tmp_path / 'no' / 'a.png'))
+    with pytest.raises(IOError):
+        writer.close()
+
+
+@pytest.mark.parametrize('extension', ['.png', '.jpg', '.bmp'])
+@pytest.mark.parametrize('flag', [0, 1, -1])
+@pytest.mark.parametrize('reduction', [1, 2, 4, 8])
+def test_read_img_reduction_sizes(tmp_path, extension, flag, reduction):
+    rng = np.random.default_rng(0)
+    filename = str(tmp_path / ('odd' + extension))
+    cv2.imwrite(filename, rng.integers(0, 256, (101, 203, 3), np.uint8))
+    img = read_img(filename, flag, reduction)
+    assert img.shape[:2] == (-(-101 // reduction), -(-203 // reduction))
+    assert img.ndim == (2 if flag == 0 else 3)
+
+
+@pytest.mark.parametrize('extension', ['.png', '.jpg'])
+def test_read_img_roi_at_reduction(tmp_path, extension):
+    rng = np.random.default_rng(0)
+    filename = str(tmp_path / ('roi' + extension))
+    cv2.imwrite(filename, rng.integers(0, 256, (101, 203, 3), np.uint8))
+    roi = BBox(xmin=17, xmax=150, ymin=9, ymax=61)
+    np.testing.assert_array_equal(read_img(filename, roi=roi),
+                                  read_img(filename)[9:61, 17:150])
+    reduced = read_img(filename, 1, 4)
+    np.testing.assert_array_equal(read_img(filename, 1, 4, roi),
+                                  reduced[2:16, 4:38])
+
+
+@pytest.fixture
+def window(monkeypatch):
+    """Replaces the OpenCV window calls, imshow takes 5 ms"""
+    calls = {'shown': [], 'titles': [], 'destroyed': 0}
+
+    def imshow(name, im):
+        time.sleep(0.005)
+        calls['shown'].append(int(im[0, 0]))
+
+    def destroy(name):
+        calls['destroyed'] += 1
+
+    monkeypatch.setattr(cv2, 'namedWindow', lambda *args: None)
+    monkeypatch.setattr(cv2, 'resizeWindow', lambda *args: None)
+    monkeypatch.setattr(cv2, 'imshow', imshow)
+    monkeypatch.setattr(cv2, 'waitKey', lambda delay=0: -1)
+    monkeypatch.setattr(cv2, 'destroyWindow', destroy)
+    monkeypatch.setattr(cv2, 'setWindowTitle',
+                        lambda name, title: calls['titles'].append(title))
+    return calls
+
+
+def test_threaded_displayer_drops_frames(window):
+    displayer = Displayer('test', threaded=True, show_fps=True)
+    updates = 200
+    for i in range(updates):
+        displayer.update_im(np.full((4, 4), i, np.int32))
+        time.sleep(0.0005)
+    deadline = time.perf_counter() + 5
+    while window['shown'][-1:] != [updates - 1]:
+        assert time.perf_counter() < deadline
+        time.sleep(0.001)
+    displayer.close()
+
+    assert not displayer._thread.is_alive()
+    assert window['destroyed'] == 1
+    assert displayer.dropped > 0
+    assert displayer.dropped + len(window['shown']) == updates
+    assert window['shown'] == sorted(window['shown'])
+    assert displayer.processing_fps > 0
+    assert displayer.display_fps > 0
+    assert len(window['titles']) == len(window['shown'])
+    with pytest.raises(RuntimeError):
+        displayer.update_im(np.zeros((4, 4), np.int32))
+
+
+def test_displayer_shows_every_frame(window):
+    displayer = Displayer('test', delay=1)
+    for i in range(5):
+        displayer.update_im(np.full((4, 4), i, np.int32))
+    displayer.close()
+    assert window['shown'] == list(range(5))
+    assert displayer.dropped == 0
+    assert displayer.processing_fps > 0
+    assert window['destroyed'] == 1
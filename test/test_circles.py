@@ -0,0 +1,47 @@
+import cv2
+import numpy as np
+from images.feature_detection import (find_circles, find_circles_pyramid,
+                                      track_circles)
+
+
+def make_circles(offset=0):
+    im = np.full((600, 800), 40, np.uint8)
+    centres = [(150 + offset, 150, 60), (450 + offset, 200, 90),
+               (300 + offset, 420, 70)]
+    for x, y, r in centres:
+        cv2.circle(im, (x, y), r, 200, -1)
+    return cv2.GaussianBlur(im, (5, 5), 0), np.array(centres, float)
+
+
+def match(circles, expected):
+    assert circles.shape == (len(expected), 3)
+    circles = circles[np.argsort(circles[:, 0])]
+    expected = expected[np.argsort(expected[:, 0])]
+    np.testing.assert_allclose(circles, expected, atol=3)
+
+
+def test_pyramid_matches_full_resolution():
+    im, expected = make_circles()
+    args = (50, 100, 30, 40, 120)
+    match(find_circles(im, *args), expected)
+    match(find_circles_pyramid(im, *args), expected)
+
+
+def test_track_circles_follows_moving_circles():
+    frames, expected = zip(*[make_circles(offset) for offset in (0, 5, 10)])
+    results = list(track_circles(frames, 50, 100, 30, 40, 120))
+    for circles, centres in zip(results, expected):
+        match(circles, centres)
+
+
+def test_no_circles_gives_empty_array():
+    im = np.full((200, 200), 40, np.uint8)
+    assert find_circles_pyramid(im, 50, 100, 30, 40, 120).shape == (0, 3)
+
+
+def test_no_radius_limit():
+    im, expected = make_circles()
+    args = (50, 100, 30, 40, 0)
+    match(find_circles_pyramid(im, *args), expected)
+    for circles in track_circles([im, im], *args):
+        match(circles, expected)
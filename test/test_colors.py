@@ -0,0 +1,43 @@
+import cv2
+import numpy as np
+import pytest
+from images.colors import (bgr_to_gray_stack, bgr_to_hsv_stack,
+                           bgr_to_lab_stack, gray_to_bgr_stack,
+                           hsv_to_bgr_stack, lab_to_bgr_stack)
+
+
+@pytest.mark.parametrize('func, code, gray_input', [
+    (bgr_to_hsv_stack, cv2.COLOR_BGR2HSV, False),
+    (bgr_to_lab_stack, cv2.COLOR_BGR2LAB, False),
+    (hsv_to_bgr_stack, cv2.COLOR_HSV2BGR, False),
+    (lab_to_bgr_stack, cv2.COLOR_LAB2BGR, False),
+    (bgr_to_gray_stack, cv2.COLOR_BGR2GRAY, False),
+    (gray_to_bgr_stack, cv2.COLOR_GRAY2BGR, True),
+])
+@pytest.mark.parametrize('workers, chunk_size', [(1, None), (3, None),
+                                                 (3, 2)])
+def test_stack_matches_per_frame(func, code, gray_input, workers,
+                                 chunk_size):
+    rng = np.random.default_rng(0)
+    shape = (7, 12, 10) if gray_input else (7, 12, 10, 3)
+    stack = rng.integers(0, 256, shape, np.uint8)
+    expected = np.array([cv2.cvtColor(frame, code) for frame in stack])
+    np.testing.assert_array_equal(
+        func(stack, workers=workers, chunk_size=chunk_size), expected)
+
+
+def test_stack_out_and_errors():
+    stack = np.zeros((4, 6, 8, 3), np.uint8)
+    out = np.empty((4, 6, 8), np.uint8)
+    assert bgr_to_gray_stack(stack, out=out) is out
+    with pytest.raises(ValueError):
+        bgr_to_gray_stack(stack, out=np.empty((4, 6, 8, 3), np.uint8))
+    with pytest.raises(ValueError):
+        bgr_to_gray_stack(stack, out=np.empty((4, 6, 8), np.float32))
+    with pytest.raises(ValueError):
+        bgr_to_gray_stack(stack[:, :, ::2])
+    strided = np.empty((4, 6, 16), np.uint8)[:, :, ::2]
+    with pytest.raises(ValueError):
+        bgr_to_gray_stack(stack, out=strided)
+    assert bgr_to_gray_stack(stack[:0]).shape == (0, 6, 8)
+
@@ -0,0 +1,48 @@
+import os
+
+import cv2
+import numpy as np
+from images.colour_classifier import ColourClassifier
+
+REGIONS = {'blue': ((20, 0, 0), (255, 255, 110)),
+           'red': ((20, 150, 130), (255, 255, 255)),
+           'green': ((20, 0, 130), (255, 110, 255))}
+
+
+def test_classify_matches_lab_inrange(tmp_path):
+    rng = np.random.default_rng(0)
+    im = rng.integers(0, 256, (100, 120, 3), np.uint8)
+    lab = cv2.cvtColor(im, cv2.COLOR_BGR2LAB)
+    expected = np.zeros(im.shape[:2], np.uint8)
+    for label, (lower, upper) in reversed(
+            list(enumerate(REGIONS.values(), 1))):
+        expected[cv2.inRange(lab, lower, upper) > 0] = label
+    classifier = ColourClassifier(REGIONS, bits=7, cache=str(tmp_path))
+    assert np.mean(classifier.classify(im) == expected) > 0.99
+
+
+def test_masks_and_cache(tmp_path):
+    im = np.zeros((4, 6, 3), np.uint8)
+    im[:, :2] = (255, 0, 0)
+    im[:, 2:4] = (0, 0, 255)
+    classifier = ColourClassifier(REGIONS, cache=str(tmp_path))
+    assert len(os.listdir(str(tmp_path))) == 1
+    masks = classifier.masks(im)
+    assert masks['blue'][:, :2].all() and not masks['blue'][:, 2:].any()
+    assert masks['red'][:, 2:4].all() and not masks['red'][:, 4:].any()
+    assert not masks['green'].any()
+
+    cached = ColourClassifier(REGIONS, cache=str(tmp_path))
+    np.testing.assert_array_equal(cached.table, classifier.table)
+    out = np.empty((4, 6), np.uint8)
+    assert cached.classify(im, out=out) is out
+
+
+def test_unwritable_cache_is_skipped(tmp_path):
+    # A file in the way makes the cache directory impossible to create
+    blocker = tmp_path / 'file'
+    blocker.write_text('')
+    classifier = ColourClassifier(REGIONS, cache=str(blocker / 'cache'))
+    uncached = ColourClassifier(REGIONS, cache=False)
+    np.testing.assert_array_equal(classifier.table, uncached.table)
+    assert os.listdir(str(tmp_path)) == ['file']
@@ -0,0 +1,46 @@
+import cv2
+import numpy as np
+from images.contours import contour_features, find_contours, sort_contours
+
+
+def make_contours():
+    im = np.zeros((120, 160), np.uint8)
+    cv2.circle(im, (40, 40), 25, 255, -1)
+    cv2.rectangle(im, (90, 10), (140, 30), 255, -1)
+    cv2.ellipse(im, (110, 90), (30, 12), 30, 0, 360, 255, -1)
+    im[100, 10:30] = 255
+    im[110, 60] = 255
+    return find_contours(im)
+
+
+def test_features_match_opencv():
+    contours = make_contours()
+    features = contour_features(contours, workers=2)
+    assert len(features) == len(contours)
+    for row, contour in zip(features, contours):
+        area = cv2.contourArea(contour)
+        assert row['area'] == area
+        np.testing.assert_allclose(row['perimeter'],
+                                   cv2.arcLength(contour, True))
+        np.testing.assert_array_equal(
+            (row['left'], row['top'], row['width'], row['height']),
+            cv2.boundingRect(contour))
+        (cx, cy), (w, h), angle = cv2.minAreaRect(contour)
+        np.testing.assert_allclose(
+            (row['rect_cx'], row['rect_cy'], row['rect_width'],
+             row['rect_height'], row['rect_angle']), (cx, cy, w, h, angle))
+        if area > 0:
+            moments = cv2.moments(contour)
+            np.testing.assert_allclose(
+                (row['cx'], row['cy']),
+                (moments['m10'] / moments['m00'],
+                 moments['m01'] / moments['m00']))
+            hull_area = cv2.contourArea(cv2.convexHull(contour))
+            np.testing.assert_allclose(row['solidity'], area / hull_area)
+    assert contour_features([]).shape == (0,)
+
+
+def test_sort_contours_by_area():
+    contours = make_contours()
+    areas = [cv2.contourArea(c) for c in sort_contours(contours)]
+    assert areas == sorted(areas)
@@ -0,0 +1,49 @@
+import cv2
+import numpy as np
+import pytest
+from images.feature_detection import (extract_biggest_object,
+                                      extract_objects,
+                                      find_connected_components)
+
+
+def make_objects():
+    im = np.zeros((60, 80), np.uint8)
+    cv2.rectangle(im, (5, 5), (14, 9), 255, -1)      # 50 pixels
+    cv2.rectangle(im, (30, 10), (49, 29), 255, -1)   # 400 pixels
+    cv2.rectangle(im, (60, 40), (69, 49), 255, -1)   # 100 pixels
+    return im
+
+
+def test_objects_are_largest_first_with_matching_boxes():
+    im = make_objects()
+    _, stats, _ = find_connected_components(im)
+    objects = extract_objects(im, k=2)
+    assert [np.count_nonzero(mask) for mask, _ in objects] == [400, 100]
+    for mask, box in objects:
+        assert mask.dtype == np.uint8
+        assert set(np.unique(mask)) == {255}
+        assert mask.shape == (box[3], box[2])
+        assert any(tuple(row[:4]) == box for row in stats[1:])
+    assert objects[0][1] == (30, 10, 20, 20)
+
+
+def test_full_frame_masks():
+    im = make_objects()
+    mask, box = extract_objects(im, k=1, full_frame=True)[0]
+    assert mask.shape == im.shape
+    assert np.count_nonzero(mask) == 400
+    x, y, w, h = box
+    assert mask[y:y + h, x:x + w].all()
+    np.testing.assert_array_equal(extract_biggest_object(im), mask)
+
+
+def test_k_larger_than_object_count():
+    objects = extract_objects(make_objects(), k=10)
+    assert [np.count_nonzero(m) for m, _ in objects] == [400, 100, 50]
+
+
+def test_empty_image_raises():
+    with pytest.raises(ValueError):
+        extract_objects(np.zeros((10, 10), np.uint8))
+    with pytest.raises(ValueError):
+        extract_biggest_object(np.zeros((10, 10), np.uint8))
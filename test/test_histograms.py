@@ -0,0 +1,36 @@
+import cv2
+import numpy as np
+from images.feature_detection import histogram_peak
+from images.histograms import (HistogramAccumulator, histogram,
+                               otsu_threshold)
+
+
+def test_histogram_matches_bincount_per_channel():
+    rng = np.random.default_rng(0)
+    im = rng.integers(0, 256, (60, 80, 3), np.uint8)
+    mask = (rng.random((60, 80)) > 0.5).astype(np.uint8)
+    hist = histogram(im, mask=mask)
+    assert hist.shape == (3, 256)
+    for c in range(3):
+        np.testing.assert_array_equal(
+            hist[c], np.bincount(im[:, :, c][mask > 0], minlength=256))
+    np.testing.assert_array_equal(histogram(im.astype(np.int32)),
+                                  histogram(im))
+
+
+def test_accumulated_histogram_and_otsu():
+    rng = np.random.default_rng(1)
+    frames = [np.clip(rng.normal(mean, 15, (50, 50)), 0, 255).astype(np.uint8)
+              for mean in (70, 170, 80, 160)]
+    acc = HistogramAccumulator().extend(frames)
+    stacked = np.vstack(frames)
+    np.testing.assert_array_equal(acc.histogram, histogram(stacked))
+    assert otsu_threshold(acc.histogram) == cv2.threshold(
+        stacked, 0, 255, cv2.THRESH_OTSU)[0]
+
+
+def test_histogram_peak_range_and_channels():
+    im = np.full((10, 10, 3), (5, 100, 254), np.uint8)
+    im[0, 0] = (30, 30, 30)
+    np.testing.assert_array_equal(histogram_peak(im), [30, 100, 254])
+    assert histogram_peak(im[:, :, 0], value_range=(0, 256)) == 5
@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(code):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [ROOT, os.path.join(ROOT, 'images'), env.get('PYTHONPATH', '')])
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.split()
+
+
+def test_import_skips_optional_modules():
+    loaded = run(
+        'import sys\n'
+        'import images\n'
+        "for name in ('matplotlib', 'scipy', 'tkinter', 'PIL'):\n"
+        '    print(name in sys.modules)\n')
+    assert loaded == ['False'] * 4
+
+
+def test_guis_are_imported_when_used():
+    output = run(
+        'import images\n'
+        'from images.gui import ThresholdGui\n'
+        "print('ThresholdGui' in vars(images))\n"
+        'print(images.ThresholdGui is ThresholdGui)\n'
+        "print('ThresholdGui' in vars(images))\n")
+    assert output == ['False', 'True', 'True']
@@ -0,0 +1,52 @@
+import cv2
+import numpy as np
+import pytest
+from images.morphological import (black_hat, closing, hit_or_miss,
+                                  reconstruct, structuring_element)
+
+
+def test_structuring_element_is_cached_and_read_only():
+    element = structuring_element((5, 3), cv2.MORPH_ELLIPSE)
+    assert element is structuring_element((5, 3), cv2.MORPH_ELLIPSE)
+    assert element.shape == (3, 5)
+    assert element.dtype == np.uint8
+    assert not element.flags.writeable
+    with pytest.raises(ValueError):
+        element[0, 0] = 0
+    assert structuring_element(3) is structuring_element((3, 3))
+    custom = np.eye(3, dtype=bool)
+    np.testing.assert_array_equal(structuring_element(custom), np.eye(3))
+
+
+def test_black_hat_is_closing_minus_image():
+    rng = np.random.default_rng(0)
+    im = rng.integers(0, 256, (40, 50), dtype=np.uint8)
+    np.testing.assert_array_equal(
+        black_hat(im, (5, 5)),
+        cv2.subtract(closing(im, (5, 5)), im))
+
+
+def test_hit_or_miss_finds_isolated_pixels():
+    im = np.zeros((20, 20), np.uint8)
+    im[5, 5] = 255
+    im[10:13, 10:13] = 255
+    pattern = -np.ones((3, 3), int)
+    pattern[1, 1] = 1
+    out = np.empty_like(im)
+    result = hit_or_miss(im, pattern, out=out)
+    assert result is out
+    assert list(zip(*np.nonzero(result))) == [(5, 5)]
+
+
+def test_reconstruct_keeps_marked_objects():
+    mask = np.zeros((30, 30), np.uint8)
+    cv2.rectangle(mask, (2, 2), (10, 20), 255, -1)
+    cv2.circle(mask, (22, 22), 5, 255, -1)
+    marker = np.zeros_like(mask)
+    marker[15, 5] = 255
+    result = reconstruct(marker, mask)
+    expected = np.zeros_like(mask)
+    cv2.rectangle(expected, (2, 2), (10, 20), 255, -1)
+    np.testing.assert_array_equal(result, expected)
+    partial = reconstruct(marker, mask, max_iterations=2)
+    assert 0 < np.count_nonzero(partial) < np.count_nonzero(expected)
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from images import (adaptive_threshold, bgr_to_gray, gaussian_blur,
+                    median_blur, threshold, to_uint8)
+
+
+def test_results_are_written_into_out():
+    rng = np.random.default_rng(0)
+    gray = rng.integers(0, 256, (20, 30), np.uint8)
+    bgr = rng.integers(0, 256, (20, 30, 3), np.uint8)
+    cases = [
+        (gaussian_blur, gray, (5, 5)),
+        (median_blur, gray, 3),
+        (threshold, gray, 100),
+        (adaptive_threshold, gray, 11, 2),
+    ]
+    for func, im, *args in cases:
+        out = np.empty_like(im)
+        result = func(im, *args, out=out)
+        assert result is out
+        np.testing.assert_array_equal(result, func(im, *args))
+    out = np.empty((20, 30), np.uint8)
+    assert bgr_to_gray(bgr, out=out) is out
+    for im in (gray.astype(float), rng.normal(5, 3, (20, 30)),
+               rng.random((20, 30), np.float32)):
+        out = np.empty((20, 30), np.uint8)
+        assert to_uint8(im, out=out) is out
+        np.testing.assert_array_equal(out, to_uint8(im))
+
+
+@pytest.mark.parametrize('out', [np.empty((20, 31), np.uint8),
+                                 np.empty((20, 30), np.float32),
+                                 np.empty((20, 30, 3), np.uint8)])
+def test_mismatched_out_raises(out):
+    gray = np.zeros((20, 30), np.uint8)
+    with pytest.raises(ValueError):
+        gaussian_blur(gray, out=out)
+    with pytest.raises(ValueError):
+        threshold(gray, 100, out=out)
+    with pytest.raises(ValueError):
+        bgr_to_gray(np.zeros((20, 30, 3), np.uint8), out=out)
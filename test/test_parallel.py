@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+import pytest
+from images.parallel import FrameExecutor, parallel_map
+
+
+def frame_sum(frame, scale=1):
+    return int(frame.sum()) * scale
+
+
+def fail_on_three(frame):
+    if frame[0, 0] == 3:
+        raise ValueError('bad frame')
+    return int(frame[0, 0])
+
+
+def crash_once_on_three(frame, marker):
+    # The marker file records the first crash across worker processes
+    if frame[0, 0] == 3 and not os.path.exists(marker):
+        open(marker, 'w').close()
+        os._exit(1)
+    return int(frame[0, 0])
+
+
+def always_crash_on_three(frame):
+    if frame[0, 0] == 3:
+        os._exit(1)
+    return int(frame[0, 0])
+
+
+def test_parallel_map_keeps_order():
+    frames = [np.full((20, 30), i, np.uint8) for i in range(12)]
+    results = parallel_map(frame_sum, frames, workers=3, max_pending=4,
+                           scale=2)
+    assert results == [600 * 2 * i for i in range(12)]
+
+
+def test_executor_reports_errors():
+    frames = [np.full((4, 4), i, np.uint8) for i in range(6)]
+    with FrameExecutor(fail_on_three, (4, 4), workers=2) as executor:
+        results = executor.map(frames)
+        assert [next(results) for _ in range(3)] == [0, 1, 2]
+        with pytest.raises(RuntimeError):
+            next(results)
+
+
+def test_crashed_worker_is_restarted_and_frame_retried(tmp_path):
+    marker = str(tmp_path / 'crashed')
+    frames = [np.full((4, 4), i, np.uint8) for i in range(8)]
+    results = parallel_map(crash_once_on_three, frames, workers=2,
+                           marker=marker)
+    assert results == list(range(8))
+    assert os.path.exists(marker)
+
+
+def test_frame_that_keeps_crashing_raises():
+    frames = [np.full((4, 4), i, np.uint8) for i in range(6)]
+    with FrameExecutor(always_crash_on_three, (4, 4), workers=2,
+                       max_retries=1) as executor:
+        results = executor.map(frames)
+        assert [next(results) for _ in range(3)] == [0, 1, 2]
+        with pytest.raises(RuntimeError, match='crashed a worker'):
+            next(results)
+
+
+def test_mismatched_frames_raise():
+    frames = [np.ones((4, 4)), np.ones(4) * 2, np.uint8(3)]
+    with pytest.raises(ValueError, match=r'Frame 1 has shape \(4,\)'):
+        parallel_map(frame_sum, frames, workers=1)
+    frames = [np.ones((4, 4), np.uint8), np.full((4, 4), 1.5)]
+    with pytest.raises(ValueError, match=r'float64, expected .* uint8'):
+        parallel_map(frame_sum, frames, workers=1)
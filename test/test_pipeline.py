@@ -0,0 +1,52 @@
+import numpy as np
+from images import (Pipeline, gaussian_blur, adaptive_threshold,
+                    find_contours, draw_contours, gray_to_bgr)
+
+
+def make_frames(n=4):
+    frames = []
+    for i in range(n):
+        im = np.zeros((60, 80), np.uint8)
+        im[10 + i:30 + i, 20:50] = 200
+        frames.append(im)
+    return frames
+
+
+def contour_pipeline():
+    pipe = Pipeline()
+    pipe.add('blur', gaussian_blur, kernel=(3, 3))
+    pipe.add('thresh', adaptive_threshold, block_size=31, constant=-10)
+    pipe.add('contours', find_contours)
+    pipe.add('drawn', lambda im, c: draw_contours(gray_to_bgr(im), c),
+             inputs=('frame', 'contours'))
+    return pipe
+
+
+def test_pipeline_matches_hand_wired_chain():
+    pipe = contour_pipeline()
+    for frame in make_frames():
+        thresh, drawn = pipe.process(frame, outputs=['thresh', 'drawn'])
+        expected = adaptive_threshold(gaussian_blur(frame), 31, -10)
+        np.testing.assert_array_equal(thresh, expected)
+        assert drawn.shape == (60, 80, 3)
+
+
+def test_pipeline_reuses_buffers():
+    pipe = contour_pipeline()
+    frames = make_frames()
+    first = pipe.process(frames[0], outputs='blur')
+    second = pipe.process(frames[1], outputs='blur')
+    assert first is second
+    timings = pipe.timings()
+    assert timings['blur']['calls'] == 2
+    assert list(timings) == ['blur', 'thresh', 'contours', 'drawn']
+
+
+def test_pipeline_resets_buffers_when_dtype_changes():
+    pipe = Pipeline().add('blur', gaussian_blur, kernel=(3, 3))
+    frame = np.random.default_rng(0).integers(0, 255, (20, 30))
+    assert pipe.process(frame.astype(np.uint8)).dtype == np.uint8
+    result = pipe.process(frame.astype(np.float32))
+    assert result.dtype == np.float32
+    np.testing.assert_allclose(
+        result, gaussian_blur(frame.astype(np.float32), (3, 3)))
@@ -0,0 +1,94 @@
+import os
+
+import cv2
+import numpy as np
+from images import probe
+from images.probe import build_manifest, probe_img
+
+
+def write_images(directory):
+    gray = np.zeros((30, 40), np.uint8)
+    cv2.imwrite(os.path.join(directory, 'gray8.png'), gray)
+    cv2.imwrite(os.path.join(directory, 'colour16.png'),
+                np.zeros((30, 40, 3), np.uint16))
+    cv2.imwrite(os.path.join(directory, 'rgba.png'),
+                np.zeros((5, 6, 4), np.uint8))
+    cv2.imwrite(os.path.join(directory, 'photo.jpg'),
+                np.zeros((20, 25, 3), np.uint8))
+    cv2.imwrite(os.path.join(directory, 'deep.tif'),
+                np.zeros((12, 14), np.uint16))
+
+
+def test_probe_formats(tmp_path):
+    write_images(str(tmp_path))
+
+    def info(name):
+        return probe_img(str(tmp_path / name))
+
+    assert info('gray8.png') == {'width': 40, 'height': 30, 'channels': 1,
+                                 'bit_depth': 8}
+    assert info('colour16.png') == {'width': 40, 'height': 30,
+                                    'channels': 3, 'bit_depth': 16}
+    assert info('rgba.png')['channels'] == 4
+    assert info('photo.jpg') == {'width': 25, 'height': 20, 'channels': 3,
+                                 'bit_depth': 8}
+    assert info('deep.tif') == {'width': 14, 'height': 12, 'channels': 1,
+                                'bit_depth': 16}
+
+
+def test_manifest_cache(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    write_images(directory)
+    probed = []
+
+    def counting_probe(filepath):
+        probed.append(os.path.basename(filepath))
+        return probe_img(filepath)
+
+    monkeypatch.setattr(probe, 'probe_img', counting_probe)
+    manifest = build_manifest(directory)
+    assert len(manifest) == 5
+    assert len(probed) == 5
+    assert os.path.exists(os.path.join(directory, '.images_manifest.json'))
+
+    # Unchanged files come from the cache
+    del probed[:]
+    assert build_manifest(directory) == manifest
+    assert probed == []
+
+    # A changed file is probed again and a deleted one is dropped
+    changed = os.path.join(directory, 'gray8.png')
+    cv2.imwrite(changed, np.zeros((50, 70), np.uint8))
+    stat = os.stat(changed)
+    os.utime(changed, (stat.st_atime, stat.st_mtime + 10))
+    os.remove(os.path.join(directory, 'photo.jpg'))
+    manifest = build_manifest(directory)
+    assert probed == ['gray8.png']
+    assert len(manifest) == 4
+    assert manifest[changed]['width'] == 70
+    assert not any(path.endswith('photo.jpg') for path in manifest)
+    assert build_manifest(directory, cache=False) == manifest
+
+
+def test_manifest_ignores_broken_cache(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    write_images(directory)
+    cache = os.path.join(directory, '.images_manifest.json')
+    manifest = build_manifest(directory)
+    with open(cache) as f:
+        text = f.read()
+    with open(cache, 'w') as f:
+        f.write(text[:len(text) // 2])
+    # The file is probed again and the truncated cache replaced
+    assert build_manifest(directory) == manifest
+    with open(cache) as f:
+        assert f.read() == text
+
+    def fail(*args):
+        raise OSError('read-only')
+
+    monkeypatch.setattr(os, 'replace', fail)
+    os.remove(cache)
+    assert build_manifest(directory) == manifest
+    assert not any(name.startswith('.images_manifest')
+                   for name in os.listdir(directory))
@@ -0,0 +1,35 @@
+import json
+
+import numpy as np
+from images import *
+from images import smoothing
+
+
+def test_names_imported_with_star_are_recorded():
+    im = np.zeros((40, 30), np.uint8)
+    original = gaussian_blur
+    reset_profiling()
+    enable_profiling()
+    try:
+        assert gaussian_blur is not original
+        gaussian_blur(im, (3, 3))
+        gaussian_blur(im, (3, 3))
+        find_contours(im)
+    finally:
+        disable_profiling()
+    assert gaussian_blur is original
+    assert smoothing.gaussian_blur is original
+
+    stats = profiling_stats()
+    blur = stats['images.smoothing.gaussian_blur']
+    assert blur['calls'] == 2
+    assert blur['shapes'] == [[[40, 30], 2]]
+    assert stats['images.contours.find_contours']['calls'] == 1
+    assert 'images.smoothing.gaussian_blur' in profiling_report()
+    assert json.loads(profiling_report('json')) == stats
+
+
+def test_disabled_profiling_records_nothing():
+    reset_profiling()
+    gaussian_blur(np.zeros((10, 10), np.uint8), (3, 3))
+    assert profiling_stats() == {}
@@ -0,0 +1,42 @@
+import cv2
+import numpy as np
+from images.feature_detection import (find_connected_components,
+                                      region_properties)
+
+
+def make_regions():
+    im = np.zeros((80, 120), np.uint8)
+    cv2.rectangle(im, (5, 5), (24, 14), 255, -1)
+    cv2.circle(im, (70, 40), 15, 255, -1)
+    im[60, 100] = 255
+    return im
+
+
+def test_properties_match_per_label_loop():
+    im = make_regions()
+    labels, stats, centroids = find_connected_components(im)
+    intensity = np.random.default_rng(0).integers(0, 255, im.shape)
+    props = region_properties(labels, stats, intensity=intensity)
+    assert len(props) == len(stats) - 1
+    for row in props:
+        region = labels == row['label']
+        assert row['area'] == region.sum()
+        np.testing.assert_allclose(
+            (row['cx'], row['cy']), centroids[row['label']])
+        np.testing.assert_allclose(row['mean_intensity'][0],
+                                   intensity[region].mean())
+        np.testing.assert_array_equal(
+            (row['left'], row['top'], row['width'], row['height']),
+            stats[row['label'], :4])
+
+
+def test_shape_properties_and_area_filter():
+    labels, stats, _ = find_connected_components(make_regions())
+    props = region_properties(labels, min_area=2)
+    assert len(props) == 2
+    rectangle, disc = props
+    assert rectangle['width'] == 20 and rectangle['height'] == 10
+    assert abs(rectangle['orientation']) < 1e-6
+    assert rectangle['eccentricity'] > 0.8
+    assert disc['eccentricity'] < 0.1
+    assert rectangle['perimeter'] == 2 * (20 + 10) - 4
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from images.stack import StackWriter, read_stack, write_stack
+
+
+def make_frames(n=10, shape=(6, 5, 3)):
+    return [np.full(shape, i, dtype=np.uint8) for i in range(n)]
+
+
+def test_write_and_read_stack(tmp_path):
+    filename = str(tmp_path / 'stack.npy')
+    frames = make_frames()
+    stack = write_stack(iter(frames), filename)
+    assert len(stack) == 10
+    assert stack.shape == (10, 6, 5, 3)
+    assert stack.dtype == np.uint8
+    np.testing.assert_array_equal(stack[3], frames[3])
+    np.testing.assert_array_equal(np.load(filename), np.stack(frames))
+
+
+def test_slices_are_views(tmp_path):
+    filename = str(tmp_path / 'stack.npy')
+    stack = write_stack(make_frames(), filename)
+    sliced = stack[2:9:3]
+    assert np.shares_memory(sliced, stack.frames)
+    assert [f[0, 0, 0] for f in sliced] == [2, 5, 8]
+
+
+def test_find_frame_grayscale(tmp_path):
+    stack = write_stack(make_frames(), str(tmp_path / 'stack.npy'))
+    stack.grayscale = True
+    assert stack.find_frame(4).shape == (6, 5)
+
+
+def test_mismatched_frame_raises(tmp_path):
+    with StackWriter(str(tmp_path / 'stack.npy')) as writer:
+        writer.write(np.zeros((4, 4), np.uint8))
+        with pytest.raises(ValueError):
+            writer.write(np.zeros((4, 5), np.uint8))
+    assert len(read_stack(str(tmp_path / 'stack.npy'))) == 1
+
+
+def test_errors_inside_writer_propagate(tmp_path):
+    def frames():
+        raise KeyError('camera')
+        yield
+
+    filename = str(tmp_path / 'empty.npy')
+    with pytest.raises(KeyError):
+        with StackWriter(filename) as writer:
+            for frame in frames():
+                writer.write(frame)
+
+    filename = str(tmp_path / 'partial.npy')
+    with pytest.raises(KeyError):
+        with StackWriter(filename) as writer:
+            writer.write(np.ones((4, 5), np.uint8))
+            raise KeyError('camera')
+    assert read_stack(filename).shape == (1, 4, 5)
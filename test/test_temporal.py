@@ -0,0 +1,77 @@
+import numpy as np
+from images.basics import mean
+from images.temporal import (RunningMean, RunningVariance, RunningMinMax,
+                             RunningMedian, temporal_median)
+
+
+def random_frames(n=20, shape=(8, 6)):
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (n,) + shape).astype(np.uint8)
+
+
+def test_mean_matches_numpy():
+    frames = random_frames()
+    np.testing.assert_allclose(RunningMean().extend(frames).mean,
+                               frames.mean(axis=0))
+    assert mean(list(frames)).dtype == np.uint8
+
+
+def test_variance_merge_matches_numpy():
+    frames = random_frames()
+    a = RunningVariance().extend(frames[:7])
+    b = RunningVariance().update_chunk(frames[7:])
+    a.merge(b)
+    np.testing.assert_allclose(a.mean, frames.mean(axis=0))
+    np.testing.assert_allclose(a.variance(), frames.var(axis=0))
+
+
+def test_min_max_merge():
+    frames = random_frames()
+    a = RunningMinMax().extend(frames[:5]).merge(
+        RunningMinMax().update_chunk(frames[5:]))
+    np.testing.assert_array_equal(a.min, frames.min(axis=0))
+    np.testing.assert_array_equal(a.max, frames.max(axis=0))
+
+
+def test_median_within_one_bin():
+    frames = random_frames(n=51)
+    approx = temporal_median(frames, bins=32)
+    assert np.all(np.abs(approx - np.median(frames, axis=0)) <= 8)
+
+
+def test_median_merge_is_exact():
+    frames = random_frames()
+    whole = RunningMedian().extend(frames)
+    parts = RunningMedian().extend(frames[:9]).merge(
+        RunningMedian().extend(frames[9:]))
+    np.testing.assert_array_equal(whole.median, parts.median)
+
+
+def test_median_clips_values_below_range():
+    frames = np.full((5, 2, 2), 2, np.uint8)
+    median = RunningMedian(bins=24, value_range=(10, 250)).extend(
+        frames).median
+    assert (median <= 20).all()
+
+
+def test_median_remove_slides_window():
+    frames = random_frames()
+    sliding = RunningMedian().extend(frames[:10])
+    for frame in frames[:4]:
+        sliding.remove(frame)
+    np.testing.assert_array_equal(
+        sliding.median, RunningMedian().extend(frames[4:10]).median)
+
+
+def test_median_slide_matches_recount():
+    frames = random_frames(n=30)
+    sliding = RunningMedian(bins=8)
+    for n, frame in enumerate(frames):
+        sliding.slide(frame, frames[n - 5] if n >= 5 else None)
+        expected = RunningMedian(bins=8).extend(frames[max(n - 4, 0):n + 1])
+        np.testing.assert_array_equal(sliding.median, expected.median)
+        np.testing.assert_array_equal(sliding.counts, expected.counts)
+    # Other updates are picked up by the next slide
+    sliding.update(frames[0]).slide(frames[1])
+    expected = RunningMedian(bins=8).extend(frames[25:]).extend(frames[:2])
+    np.testing.assert_array_equal(sliding.median, expected.median)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from images import (tiled, gaussian_blur, median_blur, adaptive_threshold,
+                    threshold)
+from images.morphological import (dilate, erode, opening, closing,
+                                  gradient, top_hat)
+
+
+@pytest.fixture
+def image():
+    rng = np.random.default_rng(1)
+    return rng.integers(0, 256, (301, 417), dtype=np.uint8)
+
+
+@pytest.mark.parametrize('func, kwargs', [
+    (gaussian_blur, {'kernel': (7, 7)}),
+    (median_blur, {'kernel': 5}),
+    (adaptive_threshold, {'block_size': 31, 'constant': 2}),
+    (dilate, {'kernel': (5, 5), 'iterations': 2}),
+    (erode, {'kernel': (3, 3)}),
+    (opening, {'kernel': (5, 5)}),
+    (closing, {'kernel': (5, 5)}),
+    (gradient, {'kernel': (7, 3)}),
+    (top_hat, {'kernel': (9, 9)}),
+    (dilate, {'kernel': np.ones((5, 7), np.uint8)}),
+])
+def test_tiled_matches_untiled(image, func, kwargs):
+    expected = func(image, **kwargs)
+    result = tiled(func, image, tile_size=64, workers=3, **kwargs)
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_tiled_colour_to_memmap(tmp_path, image):
+    im = np.dstack((image, image[::-1], image[:, ::-1]))
+    filename = str(tmp_path / 'out.npy')
+    tiled(gaussian_blur, im, tile_size=(50, 80), out=filename)
+    np.testing.assert_array_equal(np.load(filename), gaussian_blur(im))
+
+
+def test_unknown_function_needs_halo(image):
+    with pytest.raises(ValueError):
+        tiled(threshold, image)
+    np.testing.assert_array_equal(
+        tiled(threshold, image, halo=0, value=100), threshold(image, 100))
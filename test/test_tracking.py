@@ -0,0 +1,55 @@
+import numpy as np
+from images.feature_detection import find_circles
+from images.tracking import Tracker, link, trajectory
+
+
+def moving_particles(num_frames=20, num_particles=200, seed=0):
+    rng = np.random.default_rng(seed)
+    start = rng.uniform(0, 1000, (num_particles, 2))
+    velocity = rng.uniform(-2, 2, (num_particles, 2))
+    frames = []
+    for frame in range(num_frames):
+        positions = start + frame * velocity
+        frames.append(np.column_stack((positions,
+                                       np.full(num_particles, 5.0))))
+    return frames
+
+
+def test_link_follows_every_particle():
+    frames = moving_particles()
+    table = link(frames, max_displacement=5)
+    assert len(table) == 20 * 200
+    assert len(np.unique(table['particle'])) == 200
+    for particle in range(200):
+        rows = trajectory(table, particle)
+        np.testing.assert_array_equal(rows['frame'], np.arange(20))
+
+
+def test_gap_closing_respects_memory():
+    frames = moving_particles(num_frames=6, num_particles=1)
+    frames[2] = frames[2][:0]
+    frames[3] = frames[3][:0]
+    assert len(np.unique(link(frames, 20, memory=2)['particle'])) == 1
+    assert len(np.unique(link(frames, 20, memory=1)['particle'])) == 2
+
+
+def test_closest_detection_wins():
+    tracker = Tracker(max_displacement=10)
+    tracker.update([[0, 0], [8, 0]])
+    ids = tracker.update([[7, 0], [1, 0]])
+    np.testing.assert_array_equal(ids, [1, 0])
+    ids = tracker.update([[30, 0]])
+    assert ids[0] == 2
+    assert tracker.num_particles == 3
+    assert np.isnan(tracker.table['r']).all()
+
+
+def test_frames_without_circles():
+    blank = np.zeros((100, 100), np.uint8)
+    circles = find_circles(blank, 20, 200, 10, 5, 15)
+    tracker = Tracker(max_displacement=10)
+    tracker.update([[50, 50, 5]])
+    assert len(tracker.update(circles)) == 0
+    assert len(tracker.update(None)) == 0
+    assert tracker.update([[51, 50, 5]])[0] == 0
+    assert len(tracker.table) == 2
@@ -0,0 +1,72 @@
+import cv2
+import numpy as np
+import pytest
+from images.video import VideoReader
+
+NUM_FRAMES = 30
+FRAME_BYTES = 32 * 48 * 3
+
+
+@pytest.fixture
+def video(tmp_path):
+    filename = str(tmp_path / 'frames.avi')
+    writer = cv2.VideoWriter(filename, cv2.VideoWriter_fourcc(*'MJPG'), 10,
+                             (48, 32))
+    for n in range(NUM_FRAMES):
+        writer.write(np.full((32, 48, 3), 8 * n, np.uint8))
+    writer.release()
+    return filename
+
+
+def frame_number(frame):
+    return int(round(frame.mean() / 8))
+
+
+class CountingCapture:
+    """Wraps a VideoCapture counting the seeks made through set"""
+
+    def __init__(self, cap):
+        self.cap = cap
+        self.seeks = 0
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self.seeks += 1
+        return self.cap.set(prop, value)
+
+    def __getattr__(self, name):
+        return getattr(self.cap, name)
+
+
+def test_seeks_and_grabs(video):
+    with VideoReader(video, max_skip=5) as reader:
+        reader.cap = CountingCapture(reader.cap)
+        assert len(reader) == NUM_FRAMES
+        assert frame_number(reader[10]) == 10
+        assert reader.cap.seeks == 1
+        assert frame_number(reader[14]) == 14
+        assert reader.cap.seeks == 1
+        assert frame_number(reader[3]) == 3
+        assert reader.cap.seeks == 2
+        assert frame_number(reader[-1]) == NUM_FRAMES - 1
+        assert reader.cap.seeks == 3
+        assert not reader[3].flags.writeable
+        with pytest.raises(IndexError):
+            reader[NUM_FRAMES]
+
+
+def test_cache_is_lru_and_cleared_by_grayscale(video):
+    cache_size = 3 * FRAME_BYTES / 1024 ** 2
+    with VideoReader(video, cache_size=cache_size) as reader:
+        for n in (0, 1, 2, 0, 3):
+            reader.find_frame(n)
+        assert list(reader._cache) == [2, 0, 3]
+        assert reader._cache_bytes == 3 * FRAME_BYTES
+        first = reader[0]
+        assert reader[0] is first
+
+        reader.grayscale = True
+        assert len(reader._cache) == 0
+        gray = reader[0]
+        assert gray.shape == (32, 48)
+        assert frame_number(gray) == 0